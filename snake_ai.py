@@ -0,0 +1,205 @@
+"""
+Enemy snake AI.
+
+Works on a snapshot of the board rather than the live snakes: a flat
+bytearray indexed by y * width + x marking the cells a snake cannot enter,
+plus the indexes of every food cell. Nothing here moves or changes a snake,
+it only returns the direction each snake should take next.
+
+Every enemy is decided from the same snapshot: food_distances() works out
+how far the cells next to each head are from food, and each snake then only
+has to compare its own neighbours with choose_direction(). With fewer heads
+than food it searches outwards from each head until it meets food; otherwise
+it runs one breadth first search outwards from all the food at once until it
+has reached every head, which snake_numpy grows with whole-board arrays on
+large boards. Either way the result is the same with or without NumPy.
+"""
+
+from array import array
+
+import snake_numpy
+
+# How many cells one food_distances() call may expand before settling for
+# what it has found, split evenly between the heads when they are searched
+# from one by one. The engine makes one call a tick for every enemy (one per
+# enemy on chunked boards), which bounds the time the AI takes per tick
+# whatever the board size
+ai_search_budget = 2000
+
+# Distance given to cells the food search never reached
+no_path = 0xFFFF
+
+# Direction names in the order neighbours are searched
+search_order = ("up", "down", "left", "right")
+
+
+def open_neighbours(i, width, size, marks):
+    # Returns the indexes next to i that are on the board and still unmarked,
+    # in search_order with None for the directions that are not open
+    x = i % width
+    up = i - width if i >= width and not marks[i - width] else None
+    down = i + width if i + width < size and not marks[i + width] else None
+    left = i - 1 if x > 0 and not marks[i - 1] else None
+    right = i + 1 if x < width - 1 and not marks[i + 1] else None
+    return up, down, left, right
+
+
+def food_distances(snapshot, heads, budget=None):
+    # Returns an array holding how many steps open cells are from the nearest
+    # food. The open cells next to each head in heads that are closest to food
+    # get their distance, unless the search runs out of budget first; other
+    # cells may be left at no_path. budget defaults to ai_search_budget and
+    # is split evenly between the heads when each is searched from on its own
+    width, height, blocked, food = snapshot
+    if budget is None:
+        budget = ai_search_budget
+    if len(heads) < len(food):
+        # Fewer heads than food, so growing a search from each head is less work
+        distances = array("H", [no_path]) * (width * height)
+        share = max(budget // len(heads), 1)
+        for head in heads:
+            nearest_food_steps(snapshot, head, share, distances)
+        return distances
+    if snake_numpy.use_numpy(width, height):
+        return snake_numpy.food_distances(snapshot, heads, budget, no_path)
+    return food_search(snapshot, heads, budget)
+
+
+def food_search(snapshot, heads, budget):
+    # Returns distances filled in by searching outwards from every food cell
+    # at once, a whole layer at a time. The search stops as soon as it has
+    # reached a neighbour of every head, since breadth first order means that
+    # neighbour is the head's closest one, or once budget cells are reached
+    width, height, blocked, food = snapshot
+    size = width * height
+    distances = array("H", [no_path]) * size
+    marks = bytearray(blocked)
+
+    # Map each open cell next to a head to the heads waiting on it
+    waiting = {}
+    for head in heads:
+        for j in open_neighbours(head, width, size, marks):
+            if j is not None:
+                waiting.setdefault(j, []).append(head)
+    unreached = {head for heads_waiting in waiting.values() for head in heads_waiting}
+
+    layer = []
+    for i in food:
+        if not marks[i]:
+            marks[i] = 1
+            layer.append(i)
+    reached = len(layer)
+    depth = 0
+    while layer:
+        for i in layer:
+            distances[i] = depth
+            if i in waiting:
+                unreached.difference_update(waiting.pop(i))
+        if not unreached or reached >= budget:
+            break
+        next_layer = []
+        for i in layer:
+            for j in open_neighbours(i, width, size, marks):
+                if j is not None:
+                    marks[j] = 1
+                    next_layer.append(j)
+        reached += len(next_layer)
+        layer = next_layer
+        depth += 1
+    return distances
+
+
+def nearest_food_steps(snapshot, head, budget, distances):
+    # Searches outwards from head a layer at a time, tracking which of its
+    # neighbours each cell can be reached from by a shortest path, until a
+    # layer holds food. The neighbours that layer's food is reached from are
+    # the ones closest to food, and only they get their distance filled in
+    width, height, blocked, food = snapshot
+    size = width * height
+    food_cells = set(food)
+    # 0 for open cells not reached yet, 1 for blocked or already searched
+    # cells and 2 for cells in the layer being built
+    marks = bytearray(blocked)
+    # Bit n set for each search_order direction n from the head a cell is reached by
+    steps = bytearray(size)
+    starts = open_neighbours(head, width, size, marks)
+    layer = []
+    for step in range(4):
+        if starts[step] is not None:
+            marks[starts[step]] = 1
+            steps[starts[step]] = 1 << step
+            layer.append(starts[step])
+    depth = 0
+    while layer and budget > 0:
+        found = 0
+        for i in layer:
+            if i in food_cells:
+                found |= steps[i]
+        if found:
+            for step in range(4):
+                if found & 1 << step:
+                    distances[starts[step]] = depth
+            return
+        next_layer = []
+        for i in layer:
+            budget -= 1
+            x = i % width
+            for j in (i - width if i >= width else -1, i + width if i + width < size else -1,
+                      i - 1 if x > 0 else -1, i + 1 if x < width - 1 else -1):
+                if j < 0:
+                    continue
+                if not marks[j]:
+                    marks[j] = 2
+                    steps[j] = steps[i]
+                    next_layer.append(j)
+                elif marks[j] == 2:
+                    steps[j] |= steps[i]
+        for j in next_layer:
+            marks[j] = 1
+        layer = next_layer
+        depth += 1
+
+
+def choose_direction(snapshot, head, snake_length, distances, rays=None):
+    # Returns the direction that starts the shortest path from head to food,
+    # as long as the snake still has room to fit once it gets there.
+    # Otherwise returns the open direction with the most room, or None if boxed
+    # in. rays, an ObstacleField's clear runs for the snapshot's board, breaks
+    # ties in room towards the direction that runs clear the furthest. Room is
+    # only counted up to ai_search_budget cells, so a snake longer than that
+    # costs no more to decide for than one of that length
+    width, height, blocked, food = snapshot
+    room = min(snake_length, ai_search_budget)
+    starts = open_neighbours(head, width, width * height, blocked)
+    options = [step for step in range(4) if starts[step] is not None]
+    if not options:
+        return None
+
+    closest = min(options, key=lambda step: distances[starts[step]])
+    if distances[starts[closest]] != no_path and flood_fill(snapshot, starts[closest], room) >= room:
+        return search_order[closest]
+
+    # No safe food in reach, so head for the most open space
+    if rays is None:
+        best_step = max(options, key=lambda step: flood_fill(snapshot, starts[step], room))
+    else:
+        best_step = max(options, key=lambda step: (flood_fill(snapshot, starts[step], room),
+                                                   rays[search_order[step]][head]))
+    return search_order[best_step]
+
+
+def flood_fill(snapshot, start, limit):
+    # Counts the open cells reachable from start, stopping once limit are found
+    width, height, blocked, food = snapshot
+    size = width * height
+    marks = bytearray(blocked)
+    marks[start] = 1
+    queue = [start]
+    position = 0
+    while position < len(queue) and len(queue) < limit:
+        for j in open_neighbours(queue[position], width, size, marks):
+            if j is not None:
+                marks[j] = 1
+                queue.append(j)
+        position += 1
+    return len(queue)
@@ -0,0 +1,201 @@
+"""
+Batch simulation of headless games for tuning the game's numbers.
+
+Runs many seeded games across a pool of worker processes, one per CPU core
+by default, for every combination in a grid of settings. The grid can hold
+the GameState arguments (enemies, width, height, level), the engine and AI tunables
+listed in tunables, and the run options max_ticks and player. Each finished
+game is written to a CSV or JSON lines file as soon as it comes back, and a
+summary per combination is printed at the end.
+
+Every combination plays the same seeds, so differences between them come
+from the settings rather than luck. For example:
+
+    python snake_batch.py --games 500 --grid "enemies=[1, 3]" \\
+        --grid "food_vanish_odds=[2, 3, 4]" --out results.csv
+"""
+
+import argparse
+import ast
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+
+import snake_ai
+import snake_engine
+from snake_ai import choose_direction, food_distances
+from snake_engine import GameState, board_height, board_width, directions, number_of_enemies
+from snake_levels import default_level
+
+# Module settings a grid may override, and the module each one lives in
+tunables = {
+    "ai_search_budget": snake_ai,
+    "number_foods": snake_engine,
+    "food_values": snake_engine,
+    "food_odds": snake_engine,
+    "food_vanish_odds": snake_engine,
+}
+tunable_defaults = {name: getattr(module, name) for name, module in tunables.items()}
+
+# Settings that are not tunables, with their defaults. Games still going
+# after max_ticks are stopped there, and player is the policy steering the
+# player: "ai" plays like the enemies do, "random" turns at random and
+# "straight" never turns
+game_settings = {"enemies": number_of_enemies, "width": board_width, "height": board_height,
+                 "level": default_level, "max_ticks": 5000, "player": "ai"}
+
+# Columns written for every game after the grid's own settings
+result_columns = ["seed", "ticks", "score", "player_food", "enemy_food", "lost"]
+
+
+def apply_tunables(settings):
+    # Sets every tunable to the value in settings, or back to its default, so
+    # nothing leaks from one game to the next within a worker process
+    for name, module in tunables.items():
+        setattr(module, name, settings.get(name, tunable_defaults[name]))
+
+
+def player_move(state, policy, rng):
+    # Returns the player's action for the next tick under the given policy
+    if policy == "straight":
+        return None
+    if policy == "random":
+        # Turn one tick in four, never straight back into the snake's own neck
+        if rng.randint(1, 4) > 1:
+            return None
+        snake = state.my_snake
+        return rng.choice([d for d in directions if snake.next_cell(d) != snake.segments[1]])
+    snapshot, head = state.snapshot_around(0)
+    distances = food_distances(snapshot, [head])
+    rays = state.rays() if not state.board.chunked else None
+    return choose_direction(snapshot, head, len(state.my_snake.segments), distances, rays)
+
+
+def run_game(task):
+    # Plays one game to the end (or max_ticks) and returns its settings and results
+    point, settings, seed = task
+    apply_tunables(settings)
+    options = dict(game_settings, **settings)
+    state = GameState(options["enemies"], options["width"], options["height"], seed, options["level"])
+    rng = random.Random(seed)
+    player_food = 0
+    enemy_food = 0
+    while not state.game_lost and state.tick < options["max_ticks"]:
+        for event in state.step(player_move(state, options["player"], rng)):
+            if event[0] == "eat":
+                if event[1] == 0:
+                    player_food += 1
+                else:
+                    enemy_food += 1
+    return point, dict(settings, seed=seed, ticks=state.tick, score=state.current_score,
+                       player_food=player_food, enemy_food=enemy_food, lost=state.game_lost)
+
+
+def grid_points(grid):
+    # Expands {name: [values]} into a settings dict for every combination
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def parse_grid(entries):
+    # Turns "name=value" strings into a grid, where value is a Python literal
+    # and a list gives the several values to try
+    grid = {}
+    for entry in entries:
+        name, equals, value = entry.partition("=")
+        name = name.strip()
+        if not equals or (name not in tunables and name not in game_settings):
+            raise ValueError("Unknown grid setting: " + entry)
+        try:
+            value = ast.literal_eval(value.strip())
+        except (ValueError, SyntaxError):
+            # Bare words such as player=random or player=[random, straight]
+            value = [word.strip() for word in value.strip(" []").split(",")]
+        grid[name] = value if isinstance(value, list) else [value]
+    return grid
+
+
+def run_batch(grid, games, first_seed=0, workers=None, out=None):
+    # Plays the given number of seeded games for every grid point across a
+    # process pool, passing each result to out as it finishes. Returns the
+    # grid points and {point: [results]}
+    points = grid_points(grid)
+    tasks = [(point, settings, first_seed + game)
+             for point, settings in enumerate(points) for game in range(games)]
+    workers = workers or os.cpu_count()
+    results = {point: [] for point in range(len(points))}
+    with multiprocessing.Pool(workers) as pool:
+        finished = pool.imap_unordered(run_game, tasks, chunksize=max(1, len(tasks) // (workers * 8)))
+        for point, result in finished:
+            results[point].append(result)
+            if out is not None:
+                out(result)
+    return points, results
+
+
+def summarise(settings, results):
+    # Returns one line of aggregate statistics for a grid point
+    ticks = [result["ticks"] for result in results]
+    scores = [result["score"] for result in results]
+    player_food = [result["player_food"] for result in results]
+    enemy_food = [result["enemy_food"] for result in results]
+    lost = sum(result["lost"] for result in results)
+    return (json.dumps(settings) + ": " + str(len(results)) + " games, ticks mean "
+            + format(statistics.mean(ticks), ".1f") + " median " + format(statistics.median(ticks), ".1f")
+            + ", score mean " + format(statistics.mean(scores), ".1f")
+            + ", food player " + format(statistics.mean(player_food), ".2f")
+            + " enemy " + format(statistics.mean(enemy_food), ".2f")
+            + ", lost " + format(lost / len(results), ".1%"))
+
+
+def open_output(path, columns):
+    # Returns (write, close) for streaming results to a .csv or JSON lines file
+    output_file = open(path, "w", newline="")
+    if path.endswith(".csv"):
+        writer = csv.DictWriter(output_file, columns)
+        writer.writeheader()
+
+        def write(result):
+            writer.writerow({name: json.dumps(value) if isinstance(value, (dict, list)) else value
+                             for name, value in result.items()})
+            output_file.flush()
+    else:
+        def write(result):
+            output_file.write(json.dumps(result) + "\n")
+            output_file.flush()
+    return write, output_file.close
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Simulate headless snake games over a grid of settings.")
+    parser.add_argument("--games", type=int, default=100, help="games per grid point")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game at each grid point")
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=VALUES",
+                        help="a setting and the Python literal list of values to try; repeatable")
+    parser.add_argument("--workers", type=int, default=None, help="processes to use (default: every core)")
+    parser.add_argument("--out", default=None, help="stream per-game results to this .csv or .jsonl file")
+    args = parser.parse_args(argv)
+
+    try:
+        grid = parse_grid(args.grid)
+    except ValueError as error:
+        parser.error(str(error))
+    write = None
+    if args.out:
+        write, close = open_output(args.out, list(grid) + result_columns)
+    try:
+        points, results = run_batch(grid, args.games, args.seed, args.workers, write)
+    finally:
+        if args.out:
+            close()
+    for point, settings in enumerate(points):
+        print(summarise(settings, results[point]))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
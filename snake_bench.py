@@ -0,0 +1,220 @@
+"""
+Benchmarks for the engine and the basic front end's drawing.
+
+Each scenario is a seeded game set up a particular way (board size, enemy
+count, snake length, obstacle density), played by the same AI the batch
+simulator uses for the player, for a fixed number of ticks and restarted
+with the next seed whenever the player dies. Every call to the timed
+operations is recorded, and the results give the 50th, 90th and 99th
+percentile and worst latency of each one plus the engine's ticks per second.
+
+Drawing runs under SDL's dummy video driver, so no window is needed. Results
+can be saved as a baseline and later runs compared against it:
+
+    python snake_bench.py --save-baseline bench_baseline.json
+    python snake_bench.py --baseline bench_baseline.json
+
+which exits with status 1 if any operation got slower than the tolerance.
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+
+from snake_batch import player_move
+from snake_engine import EMPTY, GameState, board_height, board_width
+from snake_levels import default_level
+
+# Each scenario's settings, on top of scenario_defaults. growth is how many
+# segments are added to every snake at the start, level is the snake_levels
+# template the obstacles are laid out from, and obstacles is None to keep
+# them or 0 to clear them
+scenario_defaults = {"width": board_width, "height": board_height, "enemies": 1, "growth": 0,
+                     "level": default_level, "obstacles": None}
+scenarios = {
+    "default": {},
+    "small_board": {"width": 20, "height": 20},
+    "large_board": {"width": 200, "height": 200, "enemies": 10},
+    "huge_board": {"width": 1000, "height": 1000, "enemies": 10},
+    "long_snakes": {"enemies": 3, "growth": 40},
+    "sparse_obstacles": {"obstacles": 0},
+    "dense_obstacles": {"level": "crowded"},
+}
+
+# GameState methods timed on every call
+timed_operations = ["step", "move_snake", "ai_movement", "check_player_collisions", "create_food"]
+
+# Percentiles reported for every operation
+percentiles = (50, 90, 99)
+
+
+def new_game(settings, seed):
+    # Returns a GameState set up for a scenario, with no events pending
+    state = GameState(settings["enemies"], settings["width"], settings["height"], seed, settings["level"])
+    board = state.board
+    if settings["obstacles"] == 0:
+        for cell in state.obstacles:
+            board.set_tile(board.index(cell), EMPTY)
+        state.obstacles = set()
+        board.build_field()
+    for growth in range(settings["growth"]):
+        for snake_id in range(len(state.snakes)):
+            state.grow_snake(snake_id)
+    state.events = []
+    return state
+
+
+def timed(function, samples):
+    # Wraps function so that every call appends its duration in nanoseconds to samples
+    clock = time.perf_counter_ns
+
+    def timed_function(*args):
+        start = clock()
+        result = function(*args)
+        samples.append(clock() - start)
+        return result
+    return timed_function
+
+
+def run_scenario(settings, ticks, seed, draw):
+    # Plays ticks ticks of a scenario and returns {operation: [nanoseconds]}
+    samples = {name: [] for name in timed_operations}
+    if draw:
+        samples["update"] = []
+        samples["game_play_drawing"] = []
+        frames_per_tick = max(1, snake.render_rate // snake.tick_rate)
+    state = None
+    played = 0
+    gc.collect()
+    while played < ticks:
+        if state is None or state.game_lost:
+            state = new_game(settings, seed)
+            seed += 1
+            for name in timed_operations:
+                setattr(state, name, timed(getattr(state, name), samples[name]))
+            if draw:
+                game = snake.Game(state)
+                game.game_play_drawing()
+        action = player_move(state, "ai", None)
+        if draw:
+            # Game.update() steps the engine and marks the changed cells for drawing
+            start = time.perf_counter_ns()
+            game.update(action)
+            samples["update"].append(time.perf_counter_ns() - start)
+            for frame in range(frames_per_tick):
+                start = time.perf_counter_ns()
+                game.game_play_drawing((frame + 1) / frames_per_tick)
+                samples["game_play_drawing"].append(time.perf_counter_ns() - start)
+        else:
+            state.step(action)
+        played += 1
+    return samples
+
+
+def summarise(samples):
+    # Turns {operation: [nanoseconds]} into percentiles in microseconds and ticks per second
+    operations = {}
+    for name, times in samples.items():
+        if not times:
+            continue
+        times = sorted(times)
+        summary = {"calls": len(times)}
+        for percentile in percentiles:
+            summary["p" + str(percentile)] = times[min(len(times) - 1, len(times) * percentile // 100)] / 1000
+        summary["max"] = times[-1] / 1000
+        operations[name] = summary
+    ticks_per_second = len(samples["step"]) / (sum(samples["step"]) / 1e9)
+    return {"ticks_per_second": ticks_per_second, "operations": operations}
+
+
+def print_results(results):
+    for name, result in results.items():
+        print(name + ": " + format(result["ticks_per_second"], ".0f") + " ticks/s")
+        for operation, summary in result["operations"].items():
+            line = "    " + operation.ljust(24) + str(summary["calls"]).rjust(7) + " calls"
+            for key in ["p" + str(percentile) for percentile in percentiles] + ["max"]:
+                line += "  " + key + " " + format(summary[key], ".1f").rjust(8) + "us"
+            print(line)
+
+
+def compare(results, baseline, tolerance):
+    # Prints how each scenario compares with the baseline and returns the
+    # regressions: a median latency or ticks per second worse than tolerance allows
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]
+        speed = result["ticks_per_second"] / before["ticks_per_second"]
+        slow = speed < 1 / (1 + tolerance)
+        print(name + ": ticks/s x" + format(speed, ".2f") + (" REGRESSION" if slow else ""))
+        if slow:
+            regressions.append((name, "ticks_per_second"))
+        for operation, summary in result["operations"].items():
+            if operation not in before["operations"]:
+                continue
+            ratio = summary["p50"] / before["operations"][operation]["p50"]
+            slow = ratio > 1 + tolerance
+            print("    " + operation.ljust(24) + " p50 x" + format(ratio, ".2f") + (" REGRESSION" if slow else ""))
+            if slow:
+                regressions.append((name, operation))
+    return regressions
+
+
+def load_snake():
+    # Imports the basic front end with SDL drawing to a dummy display and opens it
+    global snake
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import snake
+    # Nothing needs keeping from the benchmark's games
+    snake.replay_file = os.devnull
+    # The fruit images are loaded relative to the working directory
+    working_directory = os.getcwd()
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        snake.load_display()
+    finally:
+        os.chdir(working_directory)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the snake engine and drawing.")
+    parser.add_argument("--ticks", type=int, default=500, help="ticks played per scenario")
+    parser.add_argument("--seed", type=int, default=1, help="seed of each scenario's first game")
+    parser.add_argument("--scenario", action="append", choices=list(scenarios),
+                        help="scenario to run; repeatable (default: all)")
+    parser.add_argument("--no-draw", action="store_true", help="benchmark the engine only, without pygame")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--save-baseline", metavar="FILE", help="save the results as a baseline")
+    parser.add_argument("--baseline", metavar="FILE", help="compare the results with a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="fraction slower than the baseline counted as a regression (default 0.2)")
+    args = parser.parse_args(argv)
+
+    draw = not args.no_draw
+    if draw:
+        load_snake()
+    results = {}
+    for name in args.scenario or scenarios:
+        settings = dict(scenario_defaults, **scenarios[name])
+        results[name] = summarise(run_scenario(settings, args.ticks, args.seed, draw))
+    print_results(results)
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w") as results_file:
+                json.dump(results, results_file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,113 @@
+"""
+Chunked storage for very large boards.
+
+A ChunkedGrid stands in for the flat per-cell arrays a Board keeps (tiles,
+snake counts, each snake's occupancy), indexed the same way by
+y * width + x, but holds the board as square chunks of chunk_size cells
+each way. A chunk is only made when something is first put in it and is
+dropped again as soon as it holds nothing but zeroes, so on a sparse board
+the memory used follows the cells in use rather than the board's area.
+
+Reading a cell whose chunk doesn't exist gives 0. region() copies out a
+rectangle and filled_cells() lists what is in one, both visiting only the
+chunks that overlap it, which is how the AI and the drawing look at the
+part of a huge board around them without touching the rest.
+"""
+
+from array import array
+
+# Cells along each side of a chunk
+chunk_size = 32
+
+# Boards with at least this many cells are stored in chunks
+chunked_min_cells = 250000
+
+
+def use_chunks(width, height):
+    return width * height >= chunked_min_cells
+
+
+class ChunkedGrid:
+    """ A flat-indexed grid of numbers stored as chunks that only exist while non-zero. """
+
+    def __init__(self, width, height, typecode="B", size=chunk_size):
+        self.width = width
+        self.height = height
+        self.typecode = typecode
+        self.size = size
+        self.chunks_across = -(-width // size)
+        # Chunk number (row * chunks_across + column) -> the chunk's cells, row by row
+        self.chunks = {}
+        # Chunk number -> how many of its cells are non-zero
+        self.filled = {}
+
+    def __len__(self):
+        return self.width * self.height
+
+    def locate(self, i):
+        # Returns the chunk number holding flat index i, and i's position inside that chunk
+        y, x = divmod(i, self.width)
+        size = self.size
+        return (y // size) * self.chunks_across + x // size, (y % size) * size + x % size
+
+    def __getitem__(self, i):
+        key, j = self.locate(i)
+        chunk = self.chunks.get(key)
+        return chunk[j] if chunk is not None else 0
+
+    def __setitem__(self, i, value):
+        # Stores value, making the chunk if this is its first non-zero cell and
+        # dropping it once its last non-zero cell is cleared
+        key, j = self.locate(i)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            if not value:
+                return
+            chunk = self.chunks[key] = array(self.typecode, [0]) * (self.size * self.size)
+            self.filled[key] = 0
+        before = chunk[j]
+        chunk[j] = value
+        if value and not before:
+            self.filled[key] += 1
+        elif before and not value:
+            self.filled[key] -= 1
+            if not self.filled[key]:
+                del self.chunks[key]
+                del self.filled[key]
+
+    def overlapping(self, left, top, width, height):
+        # Yields (chunk, chunk left, chunk top) for every existing chunk overlapping the rectangle
+        size = self.size
+        for row in range(top // size, (top + height - 1) // size + 1):
+            for column in range(left // size, (left + width - 1) // size + 1):
+                chunk = self.chunks.get(row * self.chunks_across + column)
+                if chunk is not None:
+                    yield chunk, column * size, row * size
+
+    def region(self, left, top, width, height):
+        # Returns a copy of a rectangle of the grid as a flat array indexed by
+        # (y - top) * width + (x - left). The rectangle must lie on the board
+        cells = array(self.typecode, [0]) * (width * height)
+        size = self.size
+        for chunk, chunk_left, chunk_top in self.overlapping(left, top, width, height):
+            x_start = max(left, chunk_left)
+            x_end = min(left + width, chunk_left + size)
+            for y in range(max(top, chunk_top), min(top + height, chunk_top + size)):
+                row = (y - chunk_top) * size - chunk_left
+                to = (y - top) * width - left
+                cells[to + x_start:to + x_end] = chunk[row + x_start:row + x_end]
+        return cells
+
+    def filled_cells(self, left, top, width, height):
+        # Returns the (x, y) of every non-zero cell in a rectangle
+        cells = []
+        size = self.size
+        for chunk, chunk_left, chunk_top in self.overlapping(left, top, width, height):
+            x_start = max(left, chunk_left)
+            x_end = min(left + width, chunk_left + size)
+            for y in range(max(top, chunk_top), min(top + height, chunk_top + size)):
+                row = (y - chunk_top) * size - chunk_left
+                for x in range(x_start, x_end):
+                    if chunk[row + x]:
+                        cells.append((x, y))
+        return cells
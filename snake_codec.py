@@ -0,0 +1,317 @@
+"""
+Compact binary encoding of games and of each tick's events.
+
+A snapshot holds a whole GameState in a few hundred bytes: a fixed header
+followed by packed arrays. Obstacles are stored as runs of obstacle cells
+along the flat y * width + x grid, food as parallel arrays of cell index,
+kind and value, and each snake as its head cell plus one byte per segment
+giving the step to the next one. A resumable snapshot also carries the
+game's random generator state and free cell order, so a game restored
+from it plays on exactly as the original would have.
+
+decode_snapshot() doesn't copy the arrays out: every section of the
+returned Snapshot is a memoryview cast straight over the encoded bytes, and
+cells are only turned into tuples when asked for. Anything that isn't a
+well-formed snapshot or event frame for its board raises ValueError.
+
+An event frame holds one tick's events from GameState.step() as fixed-size
+records, one layout per kind of event, small enough to send every tick.
+
+Everything is little-endian.
+"""
+
+import struct
+import sys
+from array import array
+
+from snake_engine import directions, food_values, restore_game
+from snake_levels import level_templates
+
+# Header: magic, format version, flags, board width and height, tick, score,
+# seed, the number of snakes, food, obstacle runs and body steps, and the
+# level, padded to a multiple of 4 bytes so every array section starts
+# aligned. Version 1 had no level byte, only padding, so its snapshots read
+# as the first level, the one every game had back then
+snapshot_header = struct.Struct("<4sBBHHIiQHHIIBx")
+snapshot_magic = b"SNKS"
+snapshot_version = 2
+level_names = list(level_templates)
+
+# Header flag bits
+lost_flag = 1
+resumable_flag = 2
+
+# Words in random.Random.getstate()'s internal state
+random_state_words = 625
+
+# Codes for the step from one snake segment to the next, where 0 is a
+# segment grown on top of the one before it
+step_offsets = [(0, 0)] + list(directions.values())
+step_codes = {offset: code for code, offset in enumerate(step_offsets)}
+direction_names = list(directions)
+
+# Event frames: the tick and event count, then a record per event whose
+# first byte is its kind
+event_header = struct.Struct("<IH")
+event_kinds = ["move", "grow", "eat", "food", "game_over"]
+event_records = [
+    struct.Struct("<BHhhhh"),  # move: snake id, head x, y, tail x, y
+    struct.Struct("<BHhh"),    # grow: snake id, cell x, y
+    struct.Struct("<BHhhi"),   # eat: snake id, cell x, y, value
+    struct.Struct("<BhhBi"),   # food: cell x, y, kind, value
+    struct.Struct("<Bi"),      # game_over: score
+]
+event_codes = {kind: code for code, kind in enumerate(event_kinds)}
+
+
+class Snapshot:
+    """ A decoded snapshot, whose sections are memoryviews over the encoded bytes. """
+
+    def __init__(self, data):
+        view = memoryview(data)
+        if len(view) < snapshot_header.size:
+            raise ValueError("Snapshot is cut short")
+        (magic, version, flags, self.width, self.height, self.tick, self.score, self.seed,
+         snake_count, food_count, run_count, step_count, level) = snapshot_header.unpack_from(view)
+        if magic != snapshot_magic:
+            raise ValueError("Not a snake snapshot")
+        if version not in (1, snapshot_version):
+            raise ValueError("Unsupported snapshot version " + str(version))
+        if level >= len(level_names):
+            raise ValueError("Snapshot is of an unknown level")
+        self.level = level_names[level]
+        self.lost = bool(flags & lost_flag)
+        self.resumable = bool(flags & resumable_flag)
+        self.position = snapshot_header.size
+        self.view = view
+        self.obstacle_runs = self.section("I", run_count * 2)
+        self.food_cells = self.section("I", food_count)
+        self.food_values = self.section("i", food_count)
+        self.snake_lengths = self.section("I", snake_count)
+        self.random_words = None
+        self.free_cells = None
+        self.gauss_next = None
+        if self.resumable:
+            self.random_words = self.section("I", random_state_words)
+            free_count = self.section("I", 1)[0]
+            self.free_cells = self.section("I", free_count)
+            gauss_next = self.section("d", 1)[0]
+            self.gauss_next = None if gauss_next != gauss_next else gauss_next
+        self.snake_heads = self.section("h", snake_count * 2)
+        self.food_kinds = self.section("B", food_count)
+        self.snake_directions = self.section("B", snake_count)
+        self.snake_steps = self.section("B", step_count)
+        if self.position != len(view):
+            raise ValueError("Snapshot is " + str(len(view)) + " bytes, expected " + str(self.position))
+        self.check()
+
+    def check(self):
+        # Raises ValueError if any section holds something the board can't,
+        # so nothing read from the snapshot can reach past the board's size
+        size = self.width * self.height
+        if sum(self.obstacle_runs) > size:
+            raise ValueError("Snapshot's obstacles run off the board")
+        if any(i >= size for i in self.food_cells):
+            raise ValueError("Snapshot has food off the board")
+        if any(kind >= len(food_values) for kind in self.food_kinds):
+            raise ValueError("Snapshot has an unknown kind of food")
+        if self.free_cells is not None and (len(self.free_cells) > size or any(i >= size for i in self.free_cells)):
+            raise ValueError("Snapshot's free cells are off the board")
+        if not self.snake_lengths:
+            raise ValueError("Snapshot has no player snake")
+        if 0 in self.snake_lengths or sum(self.snake_lengths) - len(self.snake_lengths) != len(self.snake_steps):
+            raise ValueError("Snapshot's snake lengths don't match its steps")
+        for snake_id in range(len(self.snake_lengths)):
+            x, y = self.snake_heads[snake_id * 2], self.snake_heads[snake_id * 2 + 1]
+            if not (0 <= x < self.width and 0 <= y < self.height):
+                raise ValueError("Snapshot has a snake's head off the board")
+        if any(code >= len(direction_names) for code in self.snake_directions):
+            raise ValueError("Snapshot has an unknown snake direction")
+        if any(code >= len(step_offsets) for code in self.snake_steps):
+            raise ValueError("Snapshot has an unknown snake step")
+
+    def section(self, typecode, count):
+        # Returns the next count items as a memoryview of typecode, without copying
+        size = array(typecode).itemsize * count
+        end = self.position + size
+        if end > len(self.view):
+            raise ValueError("Snapshot is cut short")
+        section = self.view[self.position:end].cast(typecode)
+        self.position = end
+        if sys.byteorder != "little" and typecode != "B":
+            # Big-endian machines need a swapped copy instead
+            section = array(typecode, section)
+            section.byteswap()
+        return section
+
+    def obstacles(self):
+        # Returns every obstacle cell, expanding the runs
+        cells = []
+        i = 0
+        runs = self.obstacle_runs
+        for run in range(0, len(runs), 2):
+            i += runs[run]
+            for j in range(i, i + runs[run + 1]):
+                cells.append((j % self.width, j // self.width))
+            i += runs[run + 1]
+        return cells
+
+    def food(self):
+        # Returns the food as {cell: (kind, value)}
+        kinds = list(food_values)
+        return {(i % self.width, i // self.width): (kinds[kind], value)
+                for i, kind, value in zip(self.food_cells, self.food_kinds, self.food_values)}
+
+    def snakes(self):
+        # Returns each snake's (cells, direction), player first
+        snakes = []
+        position = 0
+        for snake_id, length in enumerate(self.snake_lengths):
+            x, y = self.snake_heads[snake_id * 2], self.snake_heads[snake_id * 2 + 1]
+            cells = [(x, y)]
+            for code in self.snake_steps[position:position + length - 1]:
+                x_change, y_change = step_offsets[code]
+                x, y = x + x_change, y + y_change
+                cells.append((x, y))
+            position += length - 1
+            snakes.append((cells, direction_names[self.snake_directions[snake_id]]))
+        return snakes
+
+    def random_state(self):
+        # Returns the state for random.Random.setstate(), or None if not resumable
+        if not self.resumable:
+            return None
+        return 3, tuple(self.random_words), self.gauss_next
+
+    def restore(self):
+        # Rebuilds the GameState, which plays on exactly as the original if the snapshot is resumable
+        return restore_game(self.width, self.height, self.seed, self.obstacles(), self.food(), self.snakes(),
+                            self.tick, self.score, self.lost, self.random_state(), self.free_cells, self.level)
+
+
+# Static functions here
+def little_endian(items):
+    # Returns an array's bytes in little-endian order
+    if sys.byteorder != "little" and items.itemsize > 1:
+        items = array(items.typecode, items)
+        items.byteswap()
+    return items.tobytes()
+
+
+def encode_snapshot(state, resumable=False):
+    # Packs a GameState into bytes. resumable also saves its random state and
+    # free cells, which a restored game needs to carry on identically
+    board = state.board
+    width = board.width
+
+    # Obstacles as (cells skipped, cells covered) runs along the flat grid
+    runs = array("I")
+    previous_end = 0
+    run_start = None
+    for i in sorted(board.index(cell) for cell in state.obstacles):
+        if run_start is not None and i == run_end:
+            run_end += 1
+            continue
+        if run_start is not None:
+            runs.extend((run_start - previous_end, run_end - run_start))
+            previous_end = run_end
+        run_start, run_end = i, i + 1
+    if run_start is not None:
+        runs.extend((run_start - previous_end, run_end - run_start))
+
+    kind_codes = {kind: code for code, kind in enumerate(food_values)}
+    food_cells = array("I", [board.index(cell) for cell in state.food])
+    values = array("i", [value for kind, value in state.food.values()])
+    food_kinds = bytes(kind_codes[kind] for kind, value in state.food.values())
+
+    lengths = array("I")
+    heads = array("h")
+    steps = bytearray()
+    for snake in state.snakes:
+        lengths.append(len(snake.segments))
+        heads.extend(snake.segments[0])
+        cells = iter(snake.segments)
+        previous = next(cells)
+        for cell in cells:
+            steps.append(step_codes[(cell[0] - previous[0], cell[1] - previous[1])])
+            previous = cell
+    snake_directions = bytes(direction_names.index(snake.direction) for snake in state.snakes)
+
+    flags = (lost_flag if state.game_lost else 0) | (resumable_flag if resumable else 0)
+    parts = [snapshot_header.pack(snapshot_magic, snapshot_version, flags, width, board.height, state.tick,
+                                  state.current_score, state.seed, len(state.snakes), len(state.food),
+                                  len(runs) // 2, len(steps), level_names.index(state.level)),
+             little_endian(runs), little_endian(food_cells), little_endian(values), little_endian(lengths)]
+    if resumable:
+        version, words, gauss_next = state.random.getstate()
+        parts.append(little_endian(array("I", words)))
+        # Chunked boards keep no free list, and pick free cells without one
+        free_cells = board.free_cells if board.free_cells is not None else ()
+        parts.append(little_endian(array("I", [len(free_cells)])))
+        parts.append(little_endian(array("I", free_cells)))
+        parts.append(struct.pack("<d", float("nan") if gauss_next is None else gauss_next))
+    parts += [little_endian(heads), food_kinds, snake_directions, bytes(steps)]
+    return b"".join(parts)
+
+
+def decode_snapshot(data):
+    return Snapshot(data)
+
+
+def encode_events(tick, events):
+    # Packs one tick's events from GameState.step() into an event frame
+    parts = [event_header.pack(tick, len(events))]
+    kind_codes = {kind: code for code, kind in enumerate(food_values)}
+    for event in events:
+        code = event_codes[event[0]]
+        record = event_records[code]
+        if code == 0:
+            parts.append(record.pack(code, event[1], *event[2], *event[3]))
+        elif code == 1:
+            parts.append(record.pack(code, event[1], *event[2]))
+        elif code == 2:
+            parts.append(record.pack(code, event[1], *event[2], event[3]))
+        elif code == 3:
+            parts.append(record.pack(code, *event[1], kind_codes[event[2]], event[3]))
+        else:
+            parts.append(record.pack(code, event[1]))
+    return b"".join(parts)
+
+
+def decode_events(data):
+    # Unpacks an event frame into (tick, events), the events laid out as
+    # GameState.step() returns them. Raises ValueError if the frame is cut
+    # short, too long or holds an unknown kind of event or food
+    view = memoryview(data)
+    if len(view) < event_header.size:
+        raise ValueError("Event frame is cut short")
+    tick, count = event_header.unpack_from(view)
+    position = event_header.size
+    kinds = list(food_values)
+    events = []
+    for event in range(count):
+        if position >= len(view):
+            raise ValueError("Event frame is cut short")
+        code = view[position]
+        if code >= len(event_records):
+            raise ValueError("Unknown event code " + str(code))
+        record = event_records[code]
+        if position + record.size > len(view):
+            raise ValueError("Event frame is cut short")
+        fields = record.unpack_from(view, position)
+        position += record.size
+        if code == 0:
+            events.append(("move", fields[1], (fields[2], fields[3]), (fields[4], fields[5])))
+        elif code == 1:
+            events.append(("grow", fields[1], (fields[2], fields[3])))
+        elif code == 2:
+            events.append(("eat", fields[1], (fields[2], fields[3]), fields[4]))
+        elif code == 3:
+            if fields[3] >= len(kinds):
+                raise ValueError("Event frame has an unknown kind of food")
+            events.append(("food", (fields[1], fields[2]), kinds[fields[3]], fields[4]))
+        else:
+            events.append(("game_over", fields[1]))
+    if position != len(view):
+        raise ValueError("Event frame is " + str(len(view)) + " bytes, expected " + str(position))
+    return tick, events
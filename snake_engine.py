@@ -0,0 +1,673 @@
+"""
+Headless Snake game engine.
+
+Holds the game rules (snakes, food, obstacles, enemy AI and scoring) without
+any pygame display, fonts or images, so a game can be stepped as fast as the
+CPU allows. The pygame front ends in snake.py and
+snake_extended/snake_extended.py only render a GameState and feed it input.
+
+Every call to GameState.step() returns the list of events that happened on
+that tick, each one a tuple starting with its kind:
+    ("move", snake_id, head_cell, tail_cell)  head added, tail cell freed
+    ("grow", snake_id, cell)                  segment appended at the tail
+    ("eat", snake_id, cell, value)            food at cell eaten
+    ("food", cell, kind, value)               new food spawned
+    ("game_over", score)                      the player has lost
+Snake ids index GameState.snakes, where the player is always 0 and the
+enemies follow it.
+"""
+
+import random
+import time
+from array import array
+from collections import deque
+
+from snake_ai import choose_direction, food_distances
+from snake_chunks import ChunkedGrid, use_chunks
+from snake_fields import ObstacleField
+from snake_levels import default_level, generate_obstacles
+from snake_numpy import BoardArrays, use_numpy
+
+# --- Globals ---
+# Board size in cells
+board_width = 40
+board_height = 40
+
+# Set snake sizes and starting cells
+player_init_size = 3
+enemy_init_size = 7
+player_start = (15, 2)
+enemy_start = (4, 30)
+number_of_enemies = 1
+
+# Obstacles are kept spawn_clearance cells away from every snake's starting
+# cells and from the spawn_runway cells ahead of its head
+spawn_clearance = 1
+spawn_runway = 5
+
+# Food kinds with their score values, and how many are placed at the start
+food_values = {"strawberry": 10, "banana": 25, "grapes": 70}
+number_foods = 5
+
+# How often each kind of food is picked, as whole-number weights, and the
+# one in food_vanish_odds chance that food an enemy eats is not replaced
+food_odds = {"strawberry": 6, "banana": 3, "grapes": 1}
+food_vanish_odds = 3
+
+# How many cells around an enemy's head it looks at on a chunked board,
+# enough for the AI's searches to run out of budget before reaching the edge
+ai_view_radius = 48
+
+# Random cells tried for free space on a chunked board before searching
+# every cell for one instead
+free_cell_attempts = 64
+
+# Board size -> array of every cell index, which new boards copy their free
+# lists from rather than counting them out one by one, for the last
+# board_index_sizes board sizes made
+board_index_sizes = 4
+board_indexes = {}
+
+# The most ticks a FixedTimestep will run to catch up at once before
+# letting the game fall behind real time instead
+max_catch_up = 5
+
+# Movement offset in cells for each direction
+directions = {"up": (0, -1), "down": (0, 1), "left": (-1, 0), "right": (1, 0)}
+
+# Tile types held in the occupancy grid
+EMPTY = 0
+OBSTACLE = 1
+FOOD = 2
+
+# Table for bytes.translate() that flags obstacle tiles with 1 and the rest with 0
+blocking_tiles = bytes(1 if tile == OBSTACLE else 0 for tile in range(256))
+
+
+class Board:
+    """ Occupancy grid over every cell of the board, indexed by y * width + x. """
+
+    def __init__(self, width=board_width, height=board_height):
+        self.width = width
+        self.height = height
+        # Very large boards keep their grids in chunks that only exist where
+        # something is (see snake_chunks.py), and no free list
+        self.chunked = use_chunks(width, height)
+        self.tiles = ChunkedGrid(width, height) if self.chunked else bytearray(width * height)
+        # How many snake segments (of any snake) sit on each cell
+        self.snake_count = self.new_grid("H")
+        # NumPy views of the two grids for bulk queries on large boards
+        self.arrays = BoardArrays(self) if use_numpy(width, height) and not self.chunked else None
+        # The index of every free cell, and where each index sits in that list
+        # (-1 when the cell is taken), so free cells can be added, removed and
+        # picked at random in O(1)
+        self.free_cells = None if self.chunked else array("l", cell_indexes(width * height))
+        self.free_position = None if self.chunked else array("l", cell_indexes(width * height))
+        # The ObstacleField of the level, once build_field() has worked it out
+        self.field = None
+
+    def new_grid(self, typecode):
+        # Returns an empty per-cell grid of array typecode, in chunks if the board is chunked
+        if self.chunked:
+            return ChunkedGrid(self.width, self.height, typecode)
+        return array(typecode, [0]) * (self.width * self.height)
+
+    def index(self, cell):
+        return cell[1] * self.width + cell[0]
+
+    def on_board(self, cell):
+        return 0 <= cell[0] < self.width and 0 <= cell[1] < self.height
+
+    def is_free(self, cell):
+        # Returns True if nothing at all is on the cell
+        i = cell[1] * self.width + cell[0]
+        return not self.tiles[i] and not self.snake_count[i]
+
+    def random_free_cell(self, rng=random):
+        # Returns a random cell with nothing on it, or None if the board is full.
+        # rng is the random.Random (or the random module) to pick it with
+        if self.chunked:
+            return self.random_free_cell_chunked(rng)
+        if not self.free_cells:
+            return None
+        i = self.free_cells[rng.randrange(len(self.free_cells))]
+        return i % self.width, i // self.width
+
+    def random_free_cell_chunked(self, rng):
+        # Without a free list, tries random cells, which on a mostly empty
+        # board finds one straight away, then falls back to a full search
+        size = self.width * self.height
+        for attempt in range(free_cell_attempts):
+            i = rng.randrange(size)
+            if not self.tiles[i] and not self.snake_count[i]:
+                return i % self.width, i // self.width
+        free = [i for i in range(size) if not self.tiles[i] and not self.snake_count[i]]
+        if not free:
+            return None
+        i = free[rng.randrange(len(free))]
+        return i % self.width, i // self.width
+
+    def set_tile(self, i, tile):
+        self.tiles[i] = tile
+        if tile == EMPTY and not self.snake_count[i]:
+            self.mark_free(i)
+        else:
+            self.mark_taken(i)
+
+    def add_snake(self, i):
+        # Counts one more snake segment on cell index i
+        if not self.snake_count[i]:
+            self.mark_taken(i)
+        self.snake_count[i] += 1
+
+    def remove_snake(self, i):
+        self.snake_count[i] -= 1
+        if not self.snake_count[i] and not self.tiles[i]:
+            self.mark_free(i)
+
+    def mark_taken(self, i):
+        # Swaps the last free cell into i's place in the free list
+        if self.chunked:
+            return
+        position = self.free_position[i]
+        if position < 0:
+            return
+        last = self.free_cells.pop()
+        if last != i:
+            self.free_cells[position] = last
+            self.free_position[last] = position
+        self.free_position[i] = -1
+
+    def mark_free(self, i):
+        if self.chunked or self.free_position[i] >= 0:
+            return
+        self.free_position[i] = len(self.free_cells)
+        self.free_cells.append(i)
+
+    def add_obstacles(self, indexes):
+        # Marks a list of cell indexes as obstacles and returns their cells
+        if self.arrays is not None:
+            self.arrays.tiles[indexes] = OBSTACLE
+            for i in indexes:
+                self.mark_taken(i)
+        else:
+            for i in indexes:
+                self.set_tile(i, OBSTACLE)
+        return [(i % self.width, i // self.width) for i in indexes]
+
+    def snapshot(self, snakes, food_cells, region=None):
+        # Returns (width, height, blocked, food) for the AI, where blocked flags
+        # every cell holding an obstacle or snake and food lists the food indexes.
+        # region, as (left, top, width, height), takes it of just that part of
+        # the board, indexed within the region
+        if region is None and self.chunked:
+            region = (0, 0, self.width, self.height)
+        if region is not None:
+            return self.region_snapshot(snakes, region)
+        if self.field is None:
+            self.build_field()
+        # The field has the obstacles flagged already, so only the snakes are left to add
+        blocked = bytearray(self.field.blocked)
+        for snake in snakes:
+            for x, y in snake.segments:
+                if 0 <= x < self.width and 0 <= y < self.height:
+                    blocked[y * self.width + x] = 1
+        return self.width, self.height, blocked, [y * self.width + x for x, y in food_cells]
+
+    def build_field(self):
+        # Works out the ObstacleField once the obstacles are in place, which
+        # the snapshots then start from; it has to be called again if the
+        # obstacles change. A board without one gets it on its first
+        # snapshot. Chunked boards go without one
+        if not self.chunked:
+            self.field = ObstacleField(self.width, self.height, self.tiles.translate(blocking_tiles))
+
+    def region_snapshot(self, snakes, region):
+        # Builds a snapshot from the chunks overlapping region, finding the food
+        # from the tiles rather than going through every food on the board
+        left, top, width, height = region
+        tiles = self.tiles.region(left, top, width, height).tobytes()
+        blocked = bytearray(tiles.translate(blocking_tiles))
+        food = []
+        i = tiles.find(FOOD)
+        while i >= 0:
+            food.append(i)
+            i = tiles.find(FOOD, i + 1)
+        for snake in snakes:
+            for x, y in snake.segments:
+                if 0 <= x - left < width and 0 <= y - top < height:
+                    blocked[(y - top) * width + x - left] = 1
+        return width, height, blocked, food
+
+    def region_around(self, cell, radius):
+        # Returns the (left, top, width, height) of the board within radius cells of cell
+        left = max(0, cell[0] - radius)
+        top = max(0, cell[1] - radius)
+        return (left, top, min(self.width, cell[0] + radius + 1) - left,
+                min(self.height, cell[1] + radius + 1) - top)
+
+    def filled_cells(self, left, top, width, height):
+        # Returns every cell in a rectangle of the board holding a tile or a snake
+        if self.chunked:
+            cells = self.tiles.filled_cells(left, top, width, height)
+            return cells + [cell for cell in self.snake_count.filled_cells(left, top, width, height)
+                            if not self.tiles[self.index(cell)]]
+        cells = []
+        for y in range(top, top + height):
+            row = y * self.width
+            for i in range(row + left, row + left + width):
+                if self.tiles[i] or self.snake_count[i]:
+                    cells.append((i - row, y))
+        return cells
+
+    def enemy_starts(self, count):
+        # Spreads enemy starting cells out from enemy_start (moved up on short
+        # boards), three rows apart and then column by column across the board
+        starts = []
+        first_row = min(enemy_start[1], self.height - 1)
+        x, y = enemy_start[0], first_row
+        while len(starts) < count:
+            if x >= self.width or y < 0:
+                raise ValueError("No room on the board for " + str(count) + " enemy snakes")
+            starts.append((x, y))
+            y -= 3
+            if y < 6:
+                x, y = x + enemy_init_size + 2, first_row
+        return starts
+
+
+class Snake:
+    """ Class to represent one snake as a deque of cells, head first. """
+
+    def __init__(self, starting_length, is_player, starting_pos, board):
+        self.snake_length = starting_length
+        self.segments = deque()
+        self.player = is_player
+        self.board = board
+        # How many of this snake's segments sit on each board cell
+        self.occupancy = board.new_grid("H")
+        self.create_snake(starting_pos)
+
+        #  Set the initial direction
+        self.direction = "right"
+
+    def create_snake(self, starting_pos):
+        # Function to build a snake at a given starting cell x,y
+        # where starting_pos[0] = x and starting_pos[1] = y
+        for i in range(0, self.snake_length):
+            cell = (starting_pos[0] - i, starting_pos[1])
+            self.segments.append(cell)
+            self.occupy(cell)
+
+    def next_cell(self, direction=None):
+        # Returns the cell the head would move into
+        x_change, y_change = directions[direction or self.direction]
+        return self.segments[0][0] + x_change, self.segments[0][1] + y_change
+
+    def move(self, direction=None):
+        # Moves the snake one cell and returns the (head, tail) cells changed,
+        # or None if the head would go off the board
+        head = self.next_cell(direction)
+        if not self.board.on_board(head):
+            return None
+        self.segments.appendleft(head)
+        self.occupy(head)
+        tail = self.segments.pop()
+        self.vacate(tail)
+        return head, tail
+
+    def grow(self):
+        # A natural growth function which simply increases the length of the
+        # snake by one without extending its end until the last piece passes that point
+        tail = self.segments[-1]
+        self.segments.append(tail)
+        self.occupy(tail)
+        return tail
+
+    def occupy(self, cell):
+        # The enemy starts with its tail off the edge of the board, which takes no space
+        if not self.board.on_board(cell):
+            return
+        i = self.board.index(cell)
+        self.occupancy[i] += 1
+        self.board.add_snake(i)
+
+    def vacate(self, cell):
+        if not self.board.on_board(cell):
+            return
+        i = self.board.index(cell)
+        self.occupancy[i] -= 1
+        self.board.remove_snake(i)
+
+
+class GameState:
+    # One headless game: call step() once per tick with the player's input.
+    # Every random choice comes from the game's own generator, so two games
+    # made with the same seed and given the same inputs play out identically
+    def __init__(self, enemies=number_of_enemies, width=board_width, height=board_height, seed=None,
+                 level=default_level, layouts=None):
+        # layouts, if given, is a dict the caller keeps so that games started
+        # again with the same settings reuse their level's layout (see lay_out())
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.seed = seed
+        self.level = level
+        self.random = random.Random(seed)
+        self.board = Board(width, height)
+        self.enemy_snakes = [Snake(enemy_init_size, False, start, self.board)
+                             for start in self.board.enemy_starts(enemies)]
+        self.my_snake = Snake(player_init_size, True, player_start, self.board)
+        self.snakes = [self.my_snake] + self.enemy_snakes
+        # Bigger boards get as many more obstacles and food as default-sized boards would cover them
+        scale = board_scale(width, height)
+        self.lay_out(enemies, scale, layouts)
+        self.food = {}  # cell -> (kind, value)
+        self.events = []
+        for i in range(number_foods * scale):
+            self.create_food()
+        self.events = []
+        self.game_lost = False
+        self.current_score = 0
+        self.tick = 0
+
+    def step(self, player_action=None):
+        # Advances the game by one tick and returns the events it produced.
+        # player_action is a direction name, or None to keep going straight
+        self.events = []
+        if self.game_lost:
+            return self.events
+        if player_action in directions:
+            self.my_snake.direction = player_action
+        self.move_snake(0)
+        self.ai_movement()
+        self.check_player_collisions()
+        if self.game_lost:
+            self.events.append(("game_over", self.current_score))
+        self.tick += 1
+        return self.events
+
+    def move_snake(self, snake_id, direction=None):
+        snake = self.snakes[snake_id]
+        moved = snake.move(direction)
+        if moved is not None:
+            self.events.append(("move", snake_id, moved[0], moved[1]))
+        elif snake.player:  # If the player goes "off-screen"
+            self.game_lost = True
+
+    def grow_snake(self, snake_id):
+        cell = self.snakes[snake_id].grow()
+        self.events.append(("grow", snake_id, cell))
+
+    def lay_out(self, enemies, scale, layouts=None):
+        # Places the level's obstacles and sets up the board's ObstacleField.
+        # The layout comes from its own generator (see snake_levels.py), so
+        # this takes nothing from the game's random numbers. layouts, if
+        # given, maps everything a layout is worked out from to the layouts
+        # and fields already made, which are reused or added to. It only
+        # lasts as long as its owner keeps it, so an owner that changes the
+        # level templates or spawn settings should start a new one
+        board = self.board
+        key = (board.width, board.height, enemies, self.seed, self.level, scale)
+        remembered = layouts.get(key) if layouts is not None else None
+        if remembered is None:
+            layout = generate_obstacles(board.width, board.height, self.seed, self.level, self.spawn_cells(), scale)
+            self.obstacles = set(board.add_obstacles(layout))
+            board.build_field()
+            if layouts is not None:
+                layouts[key] = layout, board.field
+        else:
+            layout, board.field = remembered
+            self.obstacles = set(board.add_obstacles(layout))
+
+    def spawn_cells(self):
+        # Returns the indexes obstacles are kept off: near each snake and the way its head is facing
+        reserved = set()
+        for snake in self.snakes:
+            x_change, y_change = directions[snake.direction]
+            head = snake.segments[0]
+            ahead = [(head[0] + x_change * step, head[1] + y_change * step) for step in range(1, spawn_runway + 1)]
+            for x, y in list(snake.segments) + ahead:
+                for near_x in range(x - spawn_clearance, x + spawn_clearance + 1):
+                    for near_y in range(y - spawn_clearance, y + spawn_clearance + 1):
+                        if self.board.on_board((near_x, near_y)):
+                            reserved.add(self.board.index((near_x, near_y)))
+        return reserved
+
+    def create_food(self):
+        # Randomly choose a free food location and place a random fruit there.
+        # Returns False, placing nothing, when there is no free cell left
+        cell = self.board.random_free_cell(self.random)
+        if cell is None:
+            return False
+        kind = select_food(self.random)
+        self.food[cell] = (kind, food_values[kind])
+        self.board.set_tile(self.board.index(cell), FOOD)
+        self.events.append(("food", cell, kind, food_values[kind]))
+        return True
+
+    def replenish(self, player_obtained):
+        # Adds a random chance for the food to disappear and not replenish
+        # if the enemy gets it to increase the difficulty overtime
+        if self.random.randint(1, food_vanish_odds) == 1 and len(self.food) > 2 and not player_obtained:
+            return
+        self.create_food()
+
+    def eat_food(self, snake_id):
+        # Removes and returns the value of any food under the snake's head
+        cell = self.snakes[snake_id].segments[0]
+        if cell not in self.food:
+            return 0
+        kind, value = self.food.pop(cell)
+        self.board.set_tile(self.board.index(cell), EMPTY)
+        self.events.append(("eat", snake_id, cell, value))
+        return value
+
+    def check_player_collisions(self):
+        # Check if the snakes get food
+        value = self.eat_food(0)
+        if value:
+            self.current_score += value
+            self.grow_snake(0)
+            self.replenish(True)
+        for snake_id in range(1, len(self.snakes)):
+            value = self.eat_food(snake_id)
+            if value:
+                self.current_score -= value
+                self.grow_snake(snake_id)
+                self.replenish(False)
+
+        # Check if the player collides with an obstacle, an enemy or it's own tail
+        head = self.my_snake.segments[0]
+        i = self.board.index(head)
+        own_count = self.my_snake.occupancy[i]
+        if self.board.tiles[i] == OBSTACLE or own_count > 1 or self.board.snake_count[i] > own_count:
+            self.game_lost = True
+
+    def ai_movement(self):
+        # Decides every enemy's direction in one pass over a shared snapshot
+        # of the board, then moves them all. On a chunked board each enemy
+        # instead looks at its own snapshot of the cells around its head. The
+        # cell each enemy picks is blocked for the enemies deciding after it,
+        # so no two of them move their heads into the same cell
+        if not self.enemy_snakes:
+            return
+        claimed = set()
+        chosen = []
+        if self.board.chunked:
+            for snake_id in range(1, len(self.snakes)):
+                snapshot, head = self.snapshot_around(snake_id, claimed)
+                chosen.append(self.enemy_direction(snake_id, snapshot, head, food_distances(snapshot, [head]),
+                                                   claimed=claimed))
+                self.claim_next_cell(chosen[-1], claimed)
+        else:
+            snapshot = self.board.snapshot(self.snakes, self.food)
+            heads = [self.board.index(snake.segments[0]) for snake in self.enemy_snakes]
+            distances = food_distances(snapshot, heads)
+            for snake_id in range(1, len(self.snakes)):
+                chosen.append(self.enemy_direction(snake_id, snapshot, heads[snake_id - 1], distances, self.rays(),
+                                                   claimed))
+                i = self.claim_next_cell(chosen[-1], claimed)
+                if i is not None:
+                    snapshot[2][i] = 1
+        for snake_id, direction in chosen:
+            if direction is not None:
+                self.snakes[snake_id].direction = direction
+                self.move_snake(snake_id)
+
+    def claim_next_cell(self, choice, claimed):
+        # Adds the index of the cell an enemy's (snake_id, direction) choice
+        # moves it into to claimed and returns it, or None if it isn't moving
+        snake_id, direction = choice
+        if direction is None:
+            return None
+        cell = self.snakes[snake_id].next_cell(direction)
+        if not self.board.on_board(cell):
+            return None
+        i = self.board.index(cell)
+        claimed.add(i)
+        return i
+
+    def snapshot_around(self, snake_id, claimed=()):
+        # Returns a snapshot to decide a snake's move from and its head's index
+        # in it: the whole board, or just the cells within ai_view_radius of
+        # the head on a chunked board. The board indexes in claimed are blocked
+        head = self.snakes[snake_id].segments[0]
+        if not self.board.chunked:
+            snapshot = self.board.snapshot(self.snakes, self.food)
+            for i in claimed:
+                snapshot[2][i] = 1
+            return snapshot, self.board.index(head)
+        left, top, width, height = region = self.board.region_around(head, ai_view_radius)
+        snapshot = self.board.snapshot(self.snakes, self.food, region)
+        for i in claimed:
+            x, y = i % self.board.width - left, i // self.board.width - top
+            if 0 <= x < width and 0 <= y < height:
+                snapshot[2][y * width + x] = 1
+        return snapshot, (head[1] - top) * width + head[0] - left
+
+    def rays(self):
+        # Returns the clear run ahead of every cell in each direction, for AI
+        # working on whole-board snapshots, or None without an ObstacleField
+        return self.board.field.rays if self.board.field is not None else None
+
+    def enemy_direction(self, snake_id, snapshot, head, distances, rays=None, claimed=()):
+        # Returns (snake_id, direction) for one enemy, with head its index in
+        # the snapshot and rays from rays() if the snapshot covers the whole
+        # board. claimed holds the board indexes other enemies are moving into
+        snake = self.snakes[snake_id]
+        direction = choose_direction(snapshot, head, len(snake.segments), distances, rays)
+        if direction is None:
+            # Boxed in by snakes, so take any move that isn't into an obstacle,
+            # the player or a cell another enemy is taking
+            direction = next((d for d in directions if self.safe_next_move(snake, d)
+                              and self.board.index(snake.next_cell(d)) not in claimed), None)
+        return snake_id, direction
+
+    def safe_next_move(self, snake, direction):
+        # Checks if the enemies next move is safe or not
+        cell = snake.next_cell(direction)
+        if not self.board.on_board(cell):
+            return False
+        i = self.board.index(cell)
+        return self.board.tiles[i] != OBSTACLE and not self.my_snake.occupancy[i]
+
+
+class FixedTimestep:
+    """ Works out how many fixed-length game ticks are due as real time passes. """
+
+    def __init__(self, rate, clock=time.perf_counter):
+        self.interval = 1 / rate
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        # Forgets any time built up, e.g. after the game was paused on a menu
+        self.last_time = self.clock()
+        self.lag = 0.0
+
+    def due_ticks(self):
+        # Returns how many ticks should run now to keep up with real time,
+        # never more than max_catch_up however far behind the game has got
+        now = self.clock()
+        self.lag += now - self.last_time
+        self.last_time = now
+        ticks = int(self.lag / self.interval)
+        if ticks > max_catch_up:
+            ticks = max_catch_up
+            self.lag = ticks * self.interval
+        self.lag -= ticks * self.interval
+        return ticks
+
+    def alpha(self):
+        # How far real time has got from the last tick towards the next, from 0 to 1
+        return min(self.lag / self.interval, 1.0)
+
+
+# Static functions here
+def restore_game(width, height, seed, obstacles, food, snakes, tick=0, score=0, lost=False,
+                 random_state=None, free_cells=None, level=default_level):
+    # Rebuilds a GameState from its parts, as saved by snake_codec. obstacles
+    # lists cells, food maps cell -> (kind, value) and snakes lists each
+    # snake's (cells, direction), player first. A game only carries on exactly
+    # as the original would given the original's random_state and free_cells
+    # order, which chunked boards don't have
+    state = GameState.__new__(GameState)
+    state.seed = seed
+    state.level = level
+    state.random = random.Random(seed)
+    if random_state is not None:
+        state.random.setstate(random_state)
+    state.board = board = Board(width, height)
+    state.obstacles = set(obstacles)
+    for cell in state.obstacles:
+        board.set_tile(board.index(cell), OBSTACLE)
+    state.snakes = []
+    for snake_id, (cells, direction) in enumerate(snakes):
+        snake = Snake(0, snake_id == 0, cells[0], board)
+        for cell in cells:
+            snake.segments.append(cell)
+            snake.occupy(cell)
+        snake.snake_length = len(cells)
+        snake.direction = direction
+        state.snakes.append(snake)
+    state.my_snake = state.snakes[0]
+    state.enemy_snakes = state.snakes[1:]
+    board.build_field()
+    state.food = dict(food)
+    for cell in state.food:
+        board.set_tile(board.index(cell), FOOD)
+    if free_cells is not None and not board.chunked:
+        board.free_cells = array("l", free_cells)
+        board.free_position = array("l", [-1]) * (width * height)
+        for position, i in enumerate(board.free_cells):
+            board.free_position[i] = position
+    state.events = []
+    state.game_lost = lost
+    state.current_score = score
+    state.tick = tick
+    return state
+
+
+def cell_indexes(size):
+    # Returns an array of 0 to size - 1, made once for each recent board size
+    indexes = board_indexes.pop(size, None)
+    if indexes is None:
+        indexes = array("l", range(size))
+        if len(board_indexes) >= board_index_sizes:
+            del board_indexes[next(iter(board_indexes))]
+    board_indexes[size] = indexes
+    return indexes
+
+
+def board_scale(width, height):
+    # Returns how many default-sized boards fit in a board's area, at least 1
+    return max(1, width * height // (board_width * board_height))
+
+
+def select_food(rng=random):
+    # Function to randomly select which food will spawn, weighted by food_odds
+    choice = rng.randint(1, sum(food_odds.values()))
+    for kind, weight in food_odds.items():
+        choice -= weight
+        if choice <= 0:
+            return kind
@@ -0,0 +1,365 @@
+"""
+Reinforcement learning environments for training bots to play the player snake.
+
+SnakeEnv wraps one headless GameState in the Gym style: reset() starts a new
+game and step(action) plays one tick of it, returning
+(observation, reward, terminated, truncated, info). The rules are the
+engine's own, so the food is worth 10, 25 or 70 as select_food() picks it,
+enemies eating food take its value off the score, and the game ends on the
+collisions check_player_collisions() looks for.
+
+    action       an index into actions: 0 keeps going, 1 to 4 turn up, down, left or right
+    observation  observation_channels planes of height x width bytes, indexed
+                 [channel, y, x]: obstacles, the player's body, the player's
+                 head and the enemies flagged with 1, and each food's value
+    reward       how much the score changed on that tick, plus death_reward
+                 on the tick the player dies
+    terminated   the player has died
+    truncated    the game reached max_ticks without ending
+
+VectorEnv steps many SnakeEnvs in lockstep and returns every environment's
+observations, rewards and flags as one batch, each a single block of
+memory. With workers=0 they all run in this process; otherwise they are
+split across that many worker processes, which write straight into blocks
+of shared memory, so a step only sends one short message to each worker.
+Environments that finish are reset on the spot and the batch carries the
+first observation of their next game, while the finished game's last
+observation comes back with its final info as "final_observation".
+
+Observations are NumPy arrays when NumPy is installed, and memoryviews of
+the same shape otherwise; either way they share the environment's memory,
+so they are overwritten by the next step rather than copied each time.
+
+Games normally start from a new seed each time. Given levels, an
+environment instead draws each game's seed from the levels seeds starting
+at start_level, a fixed training set of games. It keeps the layout of each
+one it has played (see GameState.lay_out() in snake_engine.py), so they
+start again in a fraction of the time; a VectorEnv's environments share
+one such set of layouts in each process. Run "python snake_env.py --envs 64 --levels 100" to
+measure the steps per second reached; most of a step's time goes on the
+enemies' AI, and workers only help with a CPU core for each.
+"""
+
+import argparse
+import multiprocessing
+import random
+import sys
+import time
+from array import array
+
+from snake_engine import GameState, board_height, board_width, directions, number_of_enemies
+from snake_levels import default_level
+from snake_numpy import numpy
+
+# The player's move for each action number, where None carries on straight
+actions = [None] + list(directions)
+
+# Observation planes, in order
+observation_channels = ("obstacle", "player", "player_head", "enemy", "food")
+
+# Reward added on the tick the player dies
+death_reward = -100
+
+# Games still going after this many ticks are cut off there
+env_max_ticks = 5000
+
+
+class SnakeEnv:
+    """ One game of snake played through reset() and step(), Gym style. """
+
+    def __init__(self, enemies=number_of_enemies, width=board_width, height=board_height, level=default_level,
+                 max_ticks=env_max_ticks, seed=None, observation=None, levels=None, start_level=0, layouts=None):
+        # observation is a writable buffer of observation_size bytes to keep
+        # the observation in, which VectorEnv uses to share one block of memory.
+        # levels, if given, limits games to the seeds start_level to
+        # start_level + levels - 1 and keeps their layouts in layouts, a dict
+        # that environments can share, or in one of its own
+        self.enemies = enemies
+        self.width = width
+        self.height = height
+        self.level = level
+        self.max_ticks = max_ticks
+        self.levels = levels
+        self.start_level = start_level
+        if layouts is None and levels:
+            layouts = {}
+        self.layouts = layouts if levels else None
+        self.size = width * height
+        self.observation_size = len(observation_channels) * self.size
+        # Picks each game's seed, so a seeded environment replays the same run of games
+        self.rng = random.Random(seed)
+        if observation is None:
+            observation = bytearray(self.observation_size)
+        self.observation = memoryview(observation).cast("B")
+        self.view = observation_view(self.observation, (len(observation_channels), height, width))
+        self.blank = bytes(self.observation_size - self.size)
+        self.state = None
+
+    def reset(self, seed=None):
+        # Starts a new game and returns (observation, info)
+        if seed is None and self.levels:
+            seed = self.start_level + self.rng.randrange(self.levels)
+        elif seed is None:
+            seed = self.rng.randrange(2 ** 32)
+        self.state = GameState(self.enemies, self.width, self.height, seed, self.level, self.layouts)
+        self.observe()
+        return self.view, {"seed": seed}
+
+    def step(self, action):
+        # Plays one tick with the player steered by actions[action] and returns
+        # (observation, reward, terminated, truncated, info)
+        state = self.state
+        score = state.current_score
+        events = state.step(actions[action])
+        reward = state.current_score - score
+        if state.game_lost:
+            reward += death_reward
+        self.update(events)
+        truncated = not state.game_lost and state.tick >= self.max_ticks
+        return self.view, reward, state.game_lost, truncated, {"score": state.current_score, "ticks": state.tick}
+
+    def observe(self):
+        # Writes the whole of the current game into the observation planes
+        state = self.state
+        board = state.board
+        size = self.size
+        width = self.width
+        observation = self.observation
+        if board.field is not None:
+            observation[:size] = board.field.blocked
+        else:
+            observation[:size] = bytes(size)
+            for x, y in state.obstacles:
+                observation[y * width + x] = 1
+        observation[size:] = self.blank
+        for plane, snake in [(1, state.my_snake)] + [(3, enemy) for enemy in state.enemy_snakes]:
+            start = plane * size
+            for x, y in snake.segments:
+                if 0 <= x < width and 0 <= y < self.height:
+                    observation[start + y * width + x] = 1
+        x, y = state.my_snake.segments[0]
+        if 0 <= x < width and 0 <= y < self.height:
+            observation[2 * size + y * width + x] = 1
+        start = 4 * size
+        for (x, y), (kind, value) in state.food.items():
+            observation[start + y * width + x] = value
+        self.head = state.my_snake.segments[0]
+
+    def update(self, events):
+        # Brings the observation planes up to date after a tick, only
+        # rewriting the cells that tick's events touched
+        state = self.state
+        size = self.size
+        width = self.width
+        observation = self.observation
+        cells = {self.head}
+        for event in events:
+            if event[0] == "move":
+                cells.add(event[2])
+                cells.add(event[3])
+            elif event[0] in ("grow", "eat"):
+                cells.add(event[2])
+            elif event[0] == "food":
+                cells.add(event[1])
+        player = state.my_snake.occupancy
+        snake_count = state.board.snake_count
+        self.head = state.my_snake.segments[0]
+        for cell in cells:
+            x, y = cell
+            if not (0 <= x < width and 0 <= y < self.height):
+                continue
+            i = y * width + x
+            observation[size + i] = 1 if player[i] else 0
+            observation[2 * size + i] = 1 if cell == self.head else 0
+            observation[3 * size + i] = 1 if snake_count[i] > player[i] else 0
+            observation[4 * size + i] = state.food[cell][1] if cell in state.food else 0
+
+
+class VectorEnv:
+    """ Many SnakeEnvs stepped together, in this process or spread over worker processes. """
+
+    def __init__(self, count, workers=0, seed=None, **settings):
+        # settings are passed on to every SnakeEnv. Environment n is seeded
+        # from seed and n, so a seeded VectorEnv plays the same games whatever
+        # the number of workers
+        self.count = count
+        self.workers = workers
+        width = settings.get("width", board_width)
+        height = settings.get("height", board_height)
+        self.observation_size = len(observation_channels) * width * height
+        self.observation_shape = (len(observation_channels), height, width)
+        # The batch, as blocks of memory shared with the workers when there are any
+        make = multiprocessing.RawArray if workers else lambda typecode, size: array(typecode, [0]) * size
+        self.buffers = {
+            "observations": make("B", count * self.observation_size),
+            "actions": make("b", count),
+            "rewards": make("d", count),
+            "terminated": make("B", count),
+            "truncated": make("B", count),
+        }
+        self.observations = observation_view(memoryview(self.buffers["observations"]).cast("B"),
+                                              (count, len(observation_channels), height, width))
+        self.rewards = batch_view(self.buffers["rewards"], "d")
+        self.terminated = batch_view(self.buffers["terminated"], "B")
+        self.truncated = batch_view(self.buffers["truncated"], "B")
+        self.seeds = [None if seed is None else str(seed) + "/" + str(n) for n in range(count)]
+        self.envs = []
+        self.connections = []
+        self.processes = []
+        if not workers:
+            self.envs = make_envs(self.buffers, 0, count, settings, self.seeds)
+            return
+        for worker in range(workers):
+            first = count * worker // workers
+            last = count * (worker + 1) // workers
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=env_worker, daemon=True,
+                                              args=(worker_connection, self.buffers, first, last, settings,
+                                                    self.seeds))
+            process.start()
+            worker_connection.close()
+            self.connections.append(connection)
+            self.processes.append(process)
+
+    def reset(self):
+        # Starts a new game in every environment and returns the observations
+        if self.workers:
+            for connection in self.connections:
+                connection.send("reset")
+            for connection in self.connections:
+                connection.recv()
+        else:
+            reset_envs(self.envs)
+        return self.observations
+
+    def step(self, chosen):
+        # Plays one tick in every environment, chosen holding each one's action.
+        # Returns (observations, rewards, terminated, truncated, finished),
+        # where finished maps the index of every environment whose game ended
+        # to that game's final info, including its "final_observation"; those
+        # environments have already been reset
+        self.buffers["actions"][:] = array("b", chosen)
+        finished = {}
+        if self.workers:
+            for connection in self.connections:
+                connection.send("step")
+            for connection in self.connections:
+                finished.update(connection.recv())
+        else:
+            finished = step_envs(self.envs, self.buffers)
+        for info in finished.values():
+            info["final_observation"] = observation_view(memoryview(info["final_observation"]),
+                                                         self.observation_shape)
+        return self.observations, self.rewards, self.terminated, self.truncated, finished
+
+    def close(self):
+        # Stops the worker processes
+        for connection in self.connections:
+            connection.send("close")
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
+
+
+# Static functions here
+def observation_view(buffer, shape):
+    # Returns buffer as an array of shape, a NumPy one if NumPy is installed
+    if numpy is not None:
+        return numpy.frombuffer(buffer, dtype=numpy.uint8).reshape(shape)
+    return buffer.cast("B", shape)
+
+
+def batch_view(buffer, typecode):
+    # Returns one value per environment from a batch buffer, as a NumPy array if NumPy is installed
+    if numpy is not None:
+        return numpy.frombuffer(buffer, dtype=numpy.dtype(typecode))
+    return memoryview(buffer).cast("B").cast(typecode)
+
+
+def make_envs(buffers, first, last, settings, seeds):
+    # Returns (index, SnakeEnv) for environments first to last - 1 of a
+    # batch, each keeping its observation in its own slice of the batch's
+    # and all sharing one dict of layouts
+    observations = memoryview(buffers["observations"]).cast("B")
+    size = len(observations) // len(seeds)
+    layouts = {}
+    return [(n, SnakeEnv(seed=seeds[n], observation=observations[n * size:(n + 1) * size], layouts=layouts,
+                         **settings))
+            for n in range(first, last)]
+
+
+def reset_envs(envs):
+    for n, env in envs:
+        env.reset()
+
+
+def step_envs(envs, buffers):
+    # Steps each env with its action from the batch, writes its results into
+    # the batch and resets any whose game ended. Returns {index: final info},
+    # with the ended game's last observation copied out as bytes
+    chosen = buffers["actions"]
+    rewards = buffers["rewards"]
+    terminated = buffers["terminated"]
+    truncated = buffers["truncated"]
+    finished = {}
+    for n, env in envs:
+        observation, reward, ended, cut_off, info = env.step(chosen[n])
+        rewards[n] = reward
+        terminated[n] = ended
+        truncated[n] = cut_off
+        if ended or cut_off:
+            info["final_observation"] = bytes(env.observation)
+            finished[n] = info
+            env.reset()
+    return finished
+
+
+def env_worker(connection, buffers, first, last, settings, seeds):
+    # Runs in a worker process: steps its share of a VectorEnv's
+    # environments each time it is told to, until told to close
+    envs = make_envs(buffers, first, last, settings, seeds)
+    while True:
+        command = connection.recv()
+        if command == "step":
+            connection.send(step_envs(envs, buffers))
+        elif command == "reset":
+            reset_envs(envs)
+            connection.send(None)
+        else:
+            break
+
+
+def main(argv):
+    # Measures how many environment steps a second a VectorEnv reaches under random play
+    parser = argparse.ArgumentParser(description="Measure snake environment steps per second.")
+    parser.add_argument("--envs", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=0, help="worker processes, or 0 to step in this process")
+    parser.add_argument("--enemies", type=int, default=number_of_enemies)
+    parser.add_argument("--levels", type=int, default=0,
+                        help="draw every game from this many seeds, or 0 for a new seed each game")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    envs = VectorEnv(args.envs, args.workers, args.seed, enemies=args.enemies, levels=args.levels or None)
+    rng = random.Random(args.seed)
+    envs.reset()
+    steps = 0
+    games = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.seconds:
+        # Carry on three ticks in four, like snake_batch's random player
+        observations, rewards, terminated, truncated, finished = envs.step(
+            [rng.randrange(len(actions)) if rng.randint(1, 4) == 1 else 0 for n in range(args.envs)])
+        steps += args.envs
+        games += len(finished)
+    elapsed = time.perf_counter() - start
+    envs.close()
+    print(str(args.envs) + " envs, " + str(args.workers) + " workers, " + str(args.enemies) + " enemies, "
+          + (str(args.levels) if args.levels else "unlimited") + " levels: "
+          + format(steps / elapsed, ".0f") + " steps/s, " + str(games) + " games finished")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
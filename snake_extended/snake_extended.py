@@ -8,8 +8,19 @@ http://programarcadegames.com/
 http://simpson.edu/computer-science/
 """
 
+import os
+import sys
+
 import pygame
-import random
+
+# The headless game engine is shared with snake.py in the folder above
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from snake_engine import FixedTimestep, GameState, board_height, board_width  # noqa: E402
+from snake_profile import Profiler  # noqa: E402
+from snake_render import (  # noqa: E402
+    BoardView, board_size_setting, cell_size, event_cells, render_text, segment_size, view_columns, view_rows)
+from snake_replay import new_replay  # noqa: E402
+from snake_scores import HighScores  # noqa: E402
 
 # --- Globals ---
 # Colors
@@ -20,246 +31,124 @@ GREEN = (0, 255, 0)
 BLUE = (0, 0, 255)
 YELLOW = (255, 255, 0)
 
-# Screen size
-game_screen_height = 600
-game_screen_width = 600
+# Board size in cells, which SNAKE_BOARD=WIDTHxHEIGHT in the environment
+# changes (e.g. SNAKE_BOARD=1000x1000)
+board_columns = board_width
+board_rows = board_height
+
+# Screen size: the window shows at most view_columns by view_rows cells (see
+# snake_render.py), scrolling to follow the player on boards bigger than that
+game_screen_width = min(board_columns, view_columns) * cell_size
+game_screen_height = min(board_rows, view_rows) * cell_size
 hud_height = 50
 
-# Margin between each segment
-segment_margin = 3
-
-# Set the width and height of each snake segment
-segment_width = min(game_screen_height, game_screen_width) / 40 - segment_margin
-segment_height = min(game_screen_height, game_screen_width) / 40 - segment_margin
-total_segments_w = int(game_screen_width / (segment_width + segment_margin))
-total_segments_h = int(game_screen_width / (segment_width + segment_margin))
-
-# Create obstacle designs
-possible_obstacles = [
-    [[-1, 0], [0, 0], [1, 0], [1, 1], [2, 1], [3, 1], [3, 2], [3, 3]],
-    [[0, 0], [0, 1], [0, 2], [0, 3], [1, 3], [2, 3], [3, 3], [4, 3], [4, 2], [4, 1], [4, 0]],
-    [[0, 0], [0, 1], [0, 2], [0, 3], [1, 1], [1, 2], [1, 3], [2, 2], [2, 3], [3, 3]],
-    [[0, 0], [1, 1], [2, 2], [3, 3]],
-    [[3, 0], [2, 1], [1, 2], [0, 3]]
-]
-
-# Scoring and saving code
-scores_to_keep = 5
-try:
-    high_scores_file = open("high_scores.txt", "r+")
-except FileNotFoundError:
-    # create the file if it doesn't yet exist
-    high_scores_file = open("high_scores.txt", "w+")
-high_scores_list = high_scores_file.readlines()
-high_scores_list = [x.strip('\n') for x in high_scores_list]
-high_scores_list = high_scores_list[:scores_to_keep]  # Only care about the 5 best scores
-for pos, x in enumerate(high_scores_list):
-    high_scores_list[pos] = x.split(' ')
-
-# Set snake sizes
-player_init_size = 3
-enemy_init_size = 7
-
-
-class Snake:
-    """ Class to represent one snake. """
-
-    def __init__(self, starting_length, is_player, starting_pos):
-        self.snake_length = starting_length
-        self.segments = []
-        self.snake_pieces = pygame.sprite.Group()
-        self.player = is_player
-        self.create_snake(starting_pos)
-
-        #  Set the initial direction and block movement
-        self.x_change = segment_width + segment_margin
-        self.y_change = 0
-
-    def create_snake(self, starting_pos):
-        # Function to build a snake at a given starting block position x,y
-        # where starting_pos[0] = x and starting_pos[1] = y
-        for i in range(0, self.snake_length):
-            x = (segment_width + segment_margin) * starting_pos[0] - (segment_width + segment_margin) * i
-            y = (segment_height + segment_margin) * starting_pos[1]
-            segment = Segment(x, y, self.player)
-            self.segments.append(segment)
-            self.snake_pieces.add(segment)
-
-    def move(self, x_change, y_change):
-        # Figure out where new segment will be
-        x = self.segments[0].rect.x + x_change
-        y = self.segments[0].rect.y + y_change
-
-        if self.check_head_onscreen(x_change, y_change):
-            # Insert a new segment into the list
-            segment = Segment(x, y, self.player)
-            self.segments.insert(0, segment)
-            self.snake_pieces.add(segment)
-            # Get rid of last segment of the snake
-            old_segment = self.segments.pop()
-            self.snake_pieces.remove(old_segment)
-        elif self.player:  # If the player goes "off-screen"
-            game.game_lost = True
-
-    def grow(self):
-        # A natural growth function which simply increases the length of the
-        # snake by one without extending its end until the last piece passes that point
-        x = self.segments[-1].rect.x
-        y = self.segments[-1].rect.y
-        segment = Segment(x, y, self.player)
-        self.segments.append(segment)
-        self.snake_pieces.add(segment)
-
-    def check_head_onscreen(self, x_change, y_change):
-        # returns false if the snake head would go off screen
-        x = self.segments[0].rect.x + x_change
-        y = self.segments[0].rect.y + y_change
-        return 0 <= x <= game_screen_width - segment_width and 0 <= y <= game_screen_height - segment_height
-
-    def ai_movement(self):
-        #  Chooses whether to continue on it's path or change direction
-        if random.randint(0, 7) == 0:  # Randomly move sometimes too
-            change_enemy_direction()
-        elif not safe_next_move():
-            change_enemy_direction()
-        else:
-            self.move(self.x_change, self.y_change)
+# Game ticks per second, and frames drawn per second in between them
+tick_rate = 12
+render_rate = 60
 
+# Map arrow keys onto engine directions
+key_directions = {pygame.K_LEFT: "left", pygame.K_RIGHT: "right", pygame.K_UP: "up", pygame.K_DOWN: "down"}
 
-class Segment(pygame.sprite.Sprite):
-    # Class to represent one segment of a snake
-    def __init__(self, x, y, player):
-        super().__init__()  # Call the parent's constructor
-        if player:
-            segment_colour = WHITE
-        else:
-            segment_colour = BLUE
-        self.image = pygame.Surface([segment_width, segment_height])
-        self.image.fill(segment_colour)
-        # Set top-left corner of the bounding rectangle to be the passed-in location.
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-
-
-class Food:
-    # Represents all instances of the food elements in play
-    # and controls creations of new food items
-    def __init__(self, game_obj):
-        self.food_items = pygame.sprite.Group()
-        number_foods = 5
-        for i in range(number_foods):
-            self.create_food(game_obj)
-
-    def create_food(self, game_obj):
-        # Function to randomly generate food location and place it
-        x = random.randint(0, total_segments_w - 1)
-        y = random.randint(0, total_segments_w - 1)
-        x *= (segment_width + segment_margin)
-        y *= (segment_height + segment_margin)
-        self.select_food(x, y, game_obj)
-
-    def select_food(self, x, y, game_obj):
-        # Function to randomly select which food will spawn
-        choice = random.randint(1, 10)
-        if choice <= 6:
-            fruit = strawberry_sprite
-            score = 10
-        elif choice <= 9:
-            fruit = banana_sprite
-            score = 25
-        else:
-            fruit = grape_sprite
-            score = 70
-        new_food = FoodItem(x, y, fruit, score)
-        if not check_food_spawn(new_food, game_obj):
-            self.food_items.add(new_food)
-        else:
-            self.create_food(game_obj)
+# Where the seed and inputs of the last game played are saved, to replay it with snake_replay.py
+replay_file = "last_game.replay"
 
-    def replenish(self, player_obtained, game_obj):
-        # Adds a random chance for the food to disappear and not replenish
-        # if the snake gets it to increase the difficulty overtime
-        if random.randint(1, 3) == 1 and len(self.food_items) > 2 and not player_obtained:
-            return
-        self.create_food(game_obj)
-
-
-class FoodItem(pygame.sprite.Sprite):
-    def __init__(self, x, y, fruit, value):
-        super().__init__()
-        self.image = fruit
-        # Set top-left corner of the bounding rectangle to be the passed-in location.
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-        self.score_value = value
-
-
-class Obstacle:
-    # Represents all Obstacle objects for this game session
-    def __init__(self, obstacles):
-        # Randomly choose which obstacle is drawn
-        random_obstacle = random.randint(0, len(possible_obstacles) - 1)
-        #  Choose a block number to have the origin spot from (the numbers are based on obstacle shapes for now)
-        origin_block_x = random.randint(2, total_segments_w - 4)
-        origin_block_y = random.randint(3, total_segments_h - 4)
-        for x in possible_obstacles[random_obstacle]:
-            rel_x = (origin_block_x + x[0]) * (segment_width + segment_margin)
-            rel_y = (origin_block_y + x[1]) * (segment_height + segment_margin)
-            new_obst_piece = ObstaclePiece(rel_x, rel_y)
-            obstacles.add(new_obst_piece)
-
-
-class ObstaclePiece(pygame.sprite.Sprite):
-    # Represents one block of an obstacle
-    def __init__(self, x, y):
-        super().__init__()
-        self.image = pygame.Surface([segment_width, segment_height])
-        self.image.fill(GREEN)
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-
-
-class Game:
+# Times each frame's input, ticks and drawing when SNAKE_PROFILE is set in the
+# environment (see snake_profile.py); None leaves the game loop untimed
+profiler = None
+
+# What the game loop reads input with: process_input, timed when profiling.
+# The name entry and play again screens call process_input directly, so the
+# time spent waiting on them stays out of the profile
+read_input = None
+
+# Scoring and saving code: how many high-scores are shown, and where they are
+# saved, next to this file. Scores from the old high_scores.txt are brought over on first run
+scores_to_keep = 5
+high_scores_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "high_scores.json")
+legacy_high_scores_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "high_scores.txt")
+high_scores = None
+
+
+class Game(BoardView):
     # Game object which governs an instance of gameplay - resettable on play_again()
     def __init__(self):
-        self.enemy_snake = Snake(enemy_init_size, False, (4, 30))
-        self.my_snake = Snake(player_init_size, True, (15, 2))
-        self.enemy_move = "right"  # So that the early snake start is consistent
-        self.obstacles = pygame.sprite.Group()
-        number_of_obstacles = random.randint(5, 10)
-        for obs in range(number_of_obstacles):
-            Obstacle(self.obstacles)
-        self.food_onscreen = Food(self)
+        super().__init__(GameState(width=board_columns, height=board_rows), screen, fruit_sprites,
+                         (game_screen_width // cell_size, game_screen_height // cell_size))
+        self.replay = new_replay(self.state)
         self.score_text = None
-        self.game_lost = False
-        self.current_score = 0
+        # The score last drawn on the HUD
+        self.drawn_score = None
+        self.drawn_name = None
+        self.full_redraw = True
         self.reset_game = False
-
-    def game_play_drawing(self):
-        # Function to draw all gameplay elements
+        # (rank, new_high_score) from saving the score once the game is lost, for drawing
+        self.high_score_result = None
+        if profiler is not None:
+            profiler.instrument(self.state, ("move_snake", "ai_movement", "check_player_collisions"))
+            profiler.instrument(self, ("update", "game_play_drawing"))
+
+    @property
+    def game_lost(self):
+        return self.state.game_lost
+
+    def update(self, player_action):
+        # Steps the engine one tick and marks the cells its events changed for redrawing
+        # The cells slid across since the last tick were only partly drawn, so redraw them whole
+        for snake_id, head, tail in self.moves:
+            self.dirty_cells.update((head, tail))
+        self.moves = []
+        self.replay.record(player_action)
+        for event in self.state.step(player_action):
+            self.dirty_cells.update(event_cells(event))
+            if event[0] == "move":
+                self.moves.append(event[1:])
+            elif event[0] == "game_over":
+                self.full_redraw = True
+                self.moves = []
+                self.replay.save(replay_file)
+                self.high_score_result = process_high_scores(event[1])
+        if self.follow_player():
+            # Everything in view has moved
+            self.full_redraw = True
+
+    def game_play_drawing(self, alpha=1.0):
+        # Redraws only the cells and HUD that changed since the last frame,
+        # drawing everything for the first frame and the gameover screen.
+        # alpha is how far (0 to 1) the snakes have slid towards the latest tick
         if game_quit:
             return
+        if self.full_redraw:
+            self.draw_everything()
+            if profiler is not None:
+                self.draw_profile(profiler, profile_font)
+            pygame.display.flip()
+            self.full_redraw = False
+        else:
+            rects = [self.draw_cell(cell) for cell in self.dirty_cells if self.in_view(cell)]
+            if self.state.current_score != self.drawn_score:
+                rects.append(self.draw_score())
+            rects.extend(self.draw_moving_cells(alpha))
+            if profiler is not None:
+                rects.append(self.draw_profile(profiler, profile_font))
+            pygame.display.update(rects)
+        self.dirty_cells.clear()
+
+    def draw_everything(self):
+        # Function to draw all gameplay elements
         screen.fill(BLACK)
-        self.my_snake.snake_pieces.draw(screen)
-        self.enemy_snake.snake_pieces.draw(screen)
-        self.food_onscreen.food_items.draw(screen)
-        self.obstacles.draw(screen)
+        self.draw_view()
         self.draw_score()
         if self.game_lost:
             self.game_over_screen()
-        pygame.display.flip()
 
     def game_over_screen(self):
         # Draws game over/play again screen
-        game_over_text = game_over_font.render("Game Over", True, WHITE, BLACK)
+        game_over_text = render_text(game_over_font, "Game Over", WHITE, BLACK)
         text_rect = game_over_text.get_rect()
         text_x = screen.get_width() / 2 - text_rect.width / 2
         text_y = screen.get_height() / 5 - text_rect.height / 2
         screen.blit(game_over_text, [text_x, text_y])
-        play_again_text = name_font.render("Press enter to play again!", True, WHITE, BLACK)
+        play_again_text = render_text(name_font, "Press enter to play again!", WHITE, BLACK)
         play_rect = play_again_text.get_rect()
         text_x = screen.get_width() / 2 - play_rect.width / 2
         screen.blit(play_again_text, [text_x, text_y + 50])
@@ -267,43 +156,40 @@ class Game:
 
     def draw_high_scores(self, text_y):
         # Draw high scores onto the end screen
-        new_score, list_pos = process_high_scores(self.current_score)
-        high_score_text = name_font.render("High-scores:", True, BLUE, BLACK)
+        list_pos, new_score = self.high_score_result
+        high_score_text = render_text(name_font, "High-scores:", BLUE, BLACK)
         high_score_rect = high_score_text.get_rect()
         text_x = screen.get_width() / 2 - high_score_rect.width / 2
         screen.blit(high_score_text, [text_x, text_y + 100])
         text_y += 100
-        for y, x in enumerate(high_scores_list):
+        for y, (name, score) in enumerate(high_scores.top(scores_to_keep)):
             high_score_colour = WHITE
             if new_score and list_pos == y:
                 high_score_colour = YELLOW
             text_y += 40
-            try:
-                score_text = name_font.render(x[0] + ": " + x[1], True, high_score_colour, BLACK)
-                score_text_rect = score_text.get_rect()
-                text_x = screen.get_width() / 2 - score_text_rect.width / 2
-                screen.blit(score_text, [text_x, text_y])
-            except IndexError:
-                raise Exception("File content format invalid or parsed incorrectly.")
+            score_text = render_text(name_font, name + ": " + str(score), high_score_colour, BLACK)
+            score_text_rect = score_text.get_rect()
+            text_x = screen.get_width() / 2 - score_text_rect.width / 2
+            screen.blit(score_text, [text_x, text_y])
+        # The player's own best, from their table of scores
+        best_score = high_scores.player_top(player_name, 1)
+        if best_score:
+            best_text = render_text(name_font, "Your best: " + str(best_score[0]), BLUE, BLACK)
+            text_x = screen.get_width() / 2 - best_text.get_rect().width / 2
+            screen.blit(best_text, [text_x, text_y + 50])
 
     def draw_score(self):
-        # Draws the scoring module onto the screen
-        self.score_text = score_font.render("Score: " + str(self.current_score), True, WHITE)
+        # Draws the scoring module onto the screen and returns the HUD area
+        hud_rect = pygame.Rect(0, game_screen_height, game_screen_width, hud_height)
+        screen.fill(BLACK, hud_rect)
+        self.score_text = render_text(score_font, "Score: " + str(self.state.current_score), WHITE)
         score_text_rect = self.score_text.get_rect()
-        score_text_rect.center = (150, 630)
+        score_text_rect.center = (game_screen_width // 4, game_screen_height + hud_height * 3 // 5)
         pygame.draw.line(screen, WHITE, (0, game_screen_height), (game_screen_width, game_screen_height), 1)
         screen.blit(self.score_text, score_text_rect)
+        self.drawn_score = self.state.current_score
+        return hud_rect
 
-    def scoring(self, enemy_hit_list, food_hit_list):
-        # Controls the scoring variable
-        for x in food_hit_list:
-            self.current_score += x.score_value
-            self.my_snake.grow()
-            self.food_onscreen.replenish(True, self)
-        for x in enemy_hit_list:
-            self.current_score -= x.score_value
-            self.enemy_snake.grow()
-            self.food_onscreen.replenish(False, self)
 
     def name_drawing(self):
         # Draws the initial name entry screen
@@ -312,9 +198,12 @@ class Game:
         if game_quit:
             name_entered = True
             return
+        if player_name == self.drawn_name:
+            return  # Nothing has been typed since the screen was last drawn
+        self.drawn_name = player_name
         screen.fill(BLACK)
-        enter_name_text = name_font.render("Enter your name: " + player_name, True, WHITE, BLACK)
-        next_line_text = name_font.render("And press enter to play.", True, WHITE, BLACK)
+        enter_name_text = render_text(name_font, "Enter your name: " + player_name, WHITE, BLACK)
+        next_line_text = render_text(name_font, "And press enter to play.", WHITE, BLACK)
         name_rect = enter_name_text.get_rect()
         next_line_rect = next_line_text.get_rect()
         text_x = screen.get_width() / 2 - name_rect.width / 2
@@ -326,10 +215,25 @@ class Game:
 
 
 # Static functions here
+def start_profiling():
+    # Switches on the profiler and its overlay if SNAKE_PROFILE is set, tracing
+    # too if SNAKE_TRACE names a file to write the trace to on exit
+    global profiler, read_input
+    read_input = process_input
+    if not os.environ.get("SNAKE_PROFILE"):
+        return
+    profiler = Profiler(trace=bool(os.environ.get("SNAKE_TRACE")))
+    read_input = profiler.timed("input", process_input)
+
+
+def stop_profiling():
+    if profiler is not None and os.environ.get("SNAKE_TRACE"):
+        profiler.write_trace(os.environ["SNAKE_TRACE"])
+
+
 def play_again():
-    # Resets the game instance and maintains the high-scores list size
-    global game, high_scores_list
-    high_scores_list = high_scores_list[:scores_to_keep]
+    # Waits for enter to be pressed and then resets the game instance
+    global game
     while not game.reset_game:
         process_input()
         if game_quit:
@@ -337,160 +241,18 @@ def play_again():
     game = Game()
 
 
-def check_food_spawn(food, game_objects):
-    # Returns True if the food would spawn on a snake or obstacle
-    spawn_collision = False
-    food_player_coll = pygame.sprite.spritecollide(food, game_objects.my_snake.segments, False)
-    food_enemy_coll = pygame.sprite.spritecollide(food, game_objects.enemy_snake.segments, False)
-    if food_player_coll or food_enemy_coll:
-        spawn_collision = True
-    food_obstacle_coll = pygame.sprite.spritecollide(food, game_objects.obstacles, False)
-    if food_obstacle_coll:
-        spawn_collision = True
-    return spawn_collision
-
-
-def check_player_collisions():
-    # Check if the snake gets food
-    food_hit_list = pygame.sprite.spritecollide(game.my_snake.segments[0], game.food_onscreen.food_items, True)
-    enemy_hit_list = pygame.sprite.spritecollide(game.enemy_snake.segments[0], game.food_onscreen.food_items, True)
-    game.scoring(enemy_hit_list, food_hit_list)
-
-    # Check if the player collides with an obstacle, the enemy or it's own tail
-    obs_hit_list = pygame.sprite.spritecollide(game.my_snake.segments[0], game.obstacles, False)
-    tail_hit_list = pygame.sprite.spritecollide(game.my_snake.segments[0], game.my_snake.segments[1:], False)
-    enemy_hit_list = pygame.sprite.spritecollide(game.my_snake.segments[0], game.enemy_snake.snake_pieces, False)
-    if obs_hit_list or tail_hit_list or enemy_hit_list:
-        game.game_lost = True
-
-
-def safe_next_move():
-    # Checks if the enemies next move is safe or not
-    if not game.enemy_snake.check_head_onscreen(game.enemy_snake.x_change, game.enemy_snake.y_change):
-        return False
-    game.enemy_snake.segments[0].rect.x += game.enemy_snake.x_change
-    game.enemy_snake.segments[0].rect.y += game.enemy_snake.y_change
-    obstacle_hit_list = pygame.sprite.spritecollide(game.enemy_snake.segments[0], game.obstacles, False)
-    player_hit_list = pygame.sprite.spritecollide(game.enemy_snake.segments[0], game.my_snake.snake_pieces, False)
-    game.enemy_snake.segments[0].rect.x -= game.enemy_snake.x_change
-    game.enemy_snake.segments[0].rect.y -= game.enemy_snake.y_change
-    if obstacle_hit_list or player_hit_list:
-        return False
-    return True
-
-
-def change_enemy_direction():
-    # Controls the changing of enemy snake direction based on path searching
-    options = {"up": direction_weighting("up"), "down": direction_weighting("down"),
-               "left": direction_weighting("left"), "right": direction_weighting("right")}
-    set_best_direction(options)
-
-
-def set_best_direction(options):
-    # Set the best direction for the enemy ai snake
-    best_direction = max(options, key=lambda key: options[key])
-    if best_direction == "up":
-        set_enemy_up()
-    if best_direction == "down":
-        set_enemy_down()
-    if best_direction == "left":
-        set_enemy_left()
-    if best_direction == "right":
-        set_enemy_right()
-    if safe_next_move():
-        game.enemy_snake.move(game.enemy_snake.x_change, game.enemy_snake.y_change)
-    else:
-        options.pop(best_direction)  # Remove the best option and leave the second best option
-        set_best_direction(options)  # Recursively process the second best option
-
-
-def direction_weighting(direction):
-    # Processes and returns the directional weighting given a direction
-    if direction == "left":
-        set_enemy_left()
-    elif direction == "right":
-        set_enemy_right()
-    elif direction == "up":
-        set_enemy_up()
-    elif direction == "down":
-        set_enemy_down()
-    current_pos_x = game.enemy_snake.segments[0].rect.x
-    current_pos_y = game.enemy_snake.segments[0].rect.y
-    direction_weight = search_path()
-    game.enemy_snake.segments[0].rect.x = current_pos_x
-    game.enemy_snake.segments[0].rect.y = current_pos_y
-    return direction_weight
-
-
-def search_path():
-    #  Path scanning ahead to calculate weighting in a certain direction
-    weighted_score = 0
-    weighted_multiplier = 1
-    while True:  # Until the snake would hit an obstacle/go off screen
-        game.enemy_snake.segments[0].rect.x += game.enemy_snake.x_change
-        game.enemy_snake.segments[0].rect.y += game.enemy_snake.y_change
-        if not game.enemy_snake.check_head_onscreen(game.enemy_snake.x_change, game.enemy_snake.y_change):
-            break
-        obstacle_hit_list = pygame.sprite.spritecollide(game.enemy_snake.segments[0], game.obstacles, False)
-        if obstacle_hit_list:
-            break
-        food_hit_list = pygame.sprite.spritecollide(game.enemy_snake.segments[0], game.food_onscreen.food_items, False)
-        if food_hit_list:
-            weighted_multiplier += 5  # To give priority for the snake to move towards the food
-        self_hit_list = pygame.sprite.spritecollide(game.enemy_snake.segments[0], game.enemy_snake.segments[1:], False)
-        for x in range(len(self_hit_list)):
-            weighted_score -= 5  # To try and stop the snake doubling back on itself unless absolutely necessary
-        weighted_score += 1
-        player_hit_list = pygame.sprite.spritecollide(game.enemy_snake.segments[0], game.my_snake.snake_pieces, False)
-        if player_hit_list:
-            weighted_multiplier += 3  # To give priority for the snake to move towards the player
-    return weighted_multiplier * weighted_score
-
-
-def set_enemy_left():
-    game.enemy_snake.x_change = (segment_width + segment_margin) * -1
-    game.enemy_snake.y_change = 0
-    game.enemy_move = "left"
-
-
-def set_enemy_right():
-    game.enemy_snake.x_change = (segment_width + segment_margin)
-    game.enemy_snake.y_change = 0
-    game.enemy_move = "right"
-
-
-def set_enemy_up():
-    game.enemy_snake.x_change = 0
-    game.enemy_snake.y_change = (segment_height + segment_margin) * -1
-    game.enemy_move = "up"
-
-
-def set_enemy_down():
-    game.enemy_snake.x_change = 0
-    game.enemy_snake.y_change = (segment_height + segment_margin)
-    game.enemy_move = "down"
-
-
 def process_input():
+    # Handles window, name entry and reset events, and returns the last direction key pressed
     global game_quit, name_entered, player_name
+    player_action = None
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             game_quit = True
         if event.type == pygame.KEYDOWN:
             if game.game_lost and event.key == pygame.K_RETURN:
                 game.reset_game = True
-            elif event.key == pygame.K_LEFT:
-                game.my_snake.x_change = (segment_width + segment_margin) * -1
-                game.my_snake.y_change = 0
-            elif event.key == pygame.K_RIGHT:
-                game.my_snake.x_change = (segment_width + segment_margin)
-                game.my_snake.y_change = 0
-            elif event.key == pygame.K_UP:
-                game.my_snake.x_change = 0
-                game.my_snake.y_change = (segment_height + segment_margin) * -1
-            elif event.key == pygame.K_DOWN:
-                game.my_snake.x_change = 0
-                game.my_snake.y_change = (segment_height + segment_margin)
+            elif event.key in key_directions:
+                player_action = key_directions[event.key]
             elif not name_entered:
                 if event.unicode.isalpha():
                     player_name += event.unicode
@@ -498,83 +260,102 @@ def process_input():
                     player_name = player_name[:-1]
                 elif event.key == pygame.K_RETURN:
                     name_entered = True
+    return player_action
 
 
-# Required to stop Pycharm throwing errors on list into list insertion
-# noinspection PyTypeChecker
 def process_high_scores(current_score):
-    # Returns whether a new score was achieved
-    # and the position of that score in the high-scores
-    global high_scores_list, player_name
-    new_high_score = False
-    score_pos = None
-    for y, x in enumerate(high_scores_list):
-        try:
-            if current_score > int(x[1]):
-                high_scores_list.insert(y, [player_name, str(current_score)])
-                new_high_score = True
-                score_pos = y
-                break  # Once we add the score, there's no point iterating further
-        except IndexError:
-            raise Exception("File content format not valid or parsed incorrectly")
-    if scores_to_keep > len(high_scores_list) and not new_high_score:
-        # Add the score to the bottom of the high scores list
-        high_scores_list.append([player_name, str(current_score)])
-        new_high_score = True
-        score_pos = len(high_scores_list) - 1
-    return new_high_score, score_pos
-
-
-# Call this function so the Pygame library can initialize itself
-pygame.init()
-
-# Create a 600x600 sized screen
-screen = pygame.display.set_mode([game_screen_width, game_screen_height + hud_height])
-
-# Set the title of the window
-pygame.display.set_caption('Snake Game')
-
-# Image loading
-strawberry_sprite = pygame.image.load('strawberry.png').convert_alpha()
-banana_sprite = pygame.image.load('banana.png').convert_alpha()
-grape_sprite = pygame.image.load('grapes.png').convert_alpha()
-strawberry_sprite = pygame.transform.scale(strawberry_sprite, (12, 12))
-banana_sprite = pygame.transform.scale(banana_sprite, (12, 12))
-grape_sprite = pygame.transform.scale(grape_sprite, (12, 12))
-
-# Fonts
-game_over_font = pygame.font.Font(None, 72)
-score_font = pygame.font.SysFont("Courier", 48)
-name_font = pygame.font.SysFont("Courier", 24)
-
-# Build list of initial food spots and obstacles
-game = Game()
-
-# Game variables and setup
-clock = pygame.time.Clock()
-game_quit = False
-player_name = ""
-name_entered = False
-
-while not game_quit:
-    # Game loop
-    while not name_entered:
-        game.name_drawing()
-    process_input()
-    if not game.game_lost:  # Freezes the game screen if you lose
-        game.my_snake.move(game.my_snake.x_change, game.my_snake.y_change)
-        game.enemy_snake.ai_movement()
-        check_player_collisions()
-    else:
-        play_again()
-    game.game_play_drawing()
-    clock.tick(12)
-
-# Write to and close the files when quitting
-high_scores_file.seek(0)
-high_scores_file.truncate()
-for x in high_scores_list:
-    high_scores_file.write(str(x[0]) + " " + str(x[1]) + "\n")
-high_scores_file.close()
-
-pygame.quit()
+    # Saves the player's score, once per game, and returns its place in the
+    # all-time table (None if too low to keep) and whether it made the high-scores shown on screen
+    rank = high_scores.add(player_name, current_score)
+    return rank, rank is not None and rank < scores_to_keep
+
+
+def load_high_scores():
+    # Loads the saved high-scores, creating the store if there are none yet
+    global high_scores
+    high_scores = HighScores(high_scores_path, legacy_path=legacy_high_scores_path)
+
+
+def load_board_size():
+    # Sets the board size, and the window to fit it, from SNAKE_BOARD as WIDTHxHEIGHT
+    global board_columns, board_rows, game_screen_width, game_screen_height
+    board_columns, board_rows = board_size_setting(board_columns, board_rows)
+    game_screen_width = min(board_columns, view_columns) * cell_size
+    game_screen_height = min(board_rows, view_rows) * cell_size
+
+
+def load_display():
+    # Opens the window and loads the images and fonts used for drawing
+    global screen, fruit_sprites, game_over_font, score_font, name_font, profile_font
+
+    # Call this function so the Pygame library can initialize itself
+    pygame.init()
+
+    # Create a screen sized to fit the board, or the view of it if it is bigger
+    screen = pygame.display.set_mode([game_screen_width, game_screen_height + hud_height])
+
+    # Set the title of the window
+    pygame.display.set_caption('Snake Game')
+
+    # Image loading
+    fruit_sprites = {}
+    for kind, file_name in (("strawberry", 'strawberry.png'), ("banana", 'banana.png'), ("grapes", 'grapes.png')):
+        fruit = pygame.image.load(file_name).convert_alpha()
+        fruit_sprites[kind] = pygame.transform.scale(fruit, (segment_size, segment_size))
+
+    # Fonts
+    game_over_font = pygame.font.Font(None, 72)
+    score_font = pygame.font.SysFont("Courier", 48)
+    profile_font = pygame.font.SysFont("Courier", 12)
+    name_font = pygame.font.SysFont("Courier", 24)
+
+
+def main():
+    global game, game_quit, player_name, name_entered
+    load_high_scores()
+    load_board_size()
+    load_display()
+    start_profiling()
+
+    # Build list of initial food spots and obstacles
+    game = Game()
+
+    # Game variables and setup
+    clock = pygame.time.Clock()
+    timestep = FixedTimestep(tick_rate)
+    game_quit = False
+    player_name = ""
+    name_entered = False
+    player_action = None
+
+    while not game_quit:
+        # Game loop: input and drawing every frame, the game itself at tick_rate
+        if not name_entered:
+            while not name_entered:
+                game.name_drawing()
+            timestep.reset()
+            if profiler is not None:
+                profiler.skip_frame()
+        player_action = read_input() or player_action
+        if not game.game_lost:  # Freezes the game screen if you lose
+            for tick in range(timestep.due_ticks()):
+                game.update(player_action)
+                player_action = None
+                if game.game_lost:
+                    break
+        else:
+            play_again()
+            timestep.reset()
+            if profiler is not None:
+                profiler.skip_frame()
+        game.game_play_drawing(timestep.alpha())
+        clock.tick(render_rate)
+        if profiler is not None:
+            profiler.end_frame()
+
+    stop_profiling()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
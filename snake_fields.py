@@ -0,0 +1,60 @@
+"""
+Obstacle fields: what the AI needs to know about a level's obstacles,
+worked out once when the level is laid out.
+
+Obstacles never move during a game, so the grid flagging them and, for
+every free cell, how many free cells lie straight ahead of it in each direction
+before an obstacle or the edge can be found up front. The AI's snapshot
+of the board then starts from a copy of the obstacle grid each tick and
+only adds the snakes, and how far a direction runs clear is a table lookup.
+"""
+
+import re
+from array import array
+
+from snake_ai import search_order
+
+# A run of free cells in a line of an obstacle grid
+free_run = re.compile(b"\x00+")
+
+
+class ObstacleField:
+    """ The obstacle grid of a level and the clear run from every cell in each direction. """
+
+    def __init__(self, width, height, blocked):
+        # blocked flags each obstacle cell with 1, indexed by y * width + x
+        self.width = width
+        self.height = height
+        self.blocked = bytes(blocked)
+        # direction -> how many free cells lie straight ahead of each free cell
+        self.rays = ray_lengths(self.blocked, width, height)
+
+
+# Static functions here
+def free_runs(cells):
+    # Returns the (start, end) of every run of free cells in a line of the grid
+    return [match.span() for match in free_run.finditer(cells)]
+
+
+def ray_lengths(blocked, width, height):
+    # Returns {direction: array} holding, for every free cell, how many free
+    # cells follow it in a straight line in that direction. Each run of free
+    # cells along a row or column just counts up from one end and down to the other
+    size = width * height
+    rays = {direction: array("H", [0]) * size for direction in search_order}
+    up, down, left, right = (rays[direction] for direction in search_order)
+    counting = array("H", range(max(width, height)))
+    for y in range(height):
+        row = y * width
+        for start, end in free_runs(blocked[row:row + width]):
+            left[row + start:row + end] = counting[:end - start]
+            right[row + start:row + end] = counting[end - start - 1::-1]
+    for x in range(width):
+        column_up = array("H", [0]) * height
+        column_down = array("H", [0]) * height
+        for start, end in free_runs(blocked[x::width]):
+            column_up[start:end] = counting[:end - start]
+            column_down[start:end] = counting[end - start - 1::-1]
+        up[x::width] = column_up
+        down[x::width] = column_down
+    return rays
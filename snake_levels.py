@@ -0,0 +1,213 @@
+"""
+Obstacle layouts for new games.
+
+A layout comes from a seed and a level template, which gives the obstacle
+shapes to use and how many of them to place on a default-sized board.
+Shapes are dropped at random origins one at a time, and a placement is
+turned down if it covers a reserved cell (where the snakes start and the
+run ahead of them), lands on another obstacle, or cuts the free cells
+around it apart. The free cells bordering a new shape have to stay joined
+up inside the box around it, which is enough for the rest of the board to
+stay in one piece too. The finished layout is then checked over the whole
+board, joining up the runs of free cells along each row with those they
+touch in the next, and one that fails is thrown away for the next layout
+from the same seed.
+
+That work adds up on big boards, so the layouts of boards with
+level_cache_min_cells or more are saved under level_cache_dir, keyed by
+everything that goes into making them, and read back from there next time.
+"""
+
+import hashlib
+import os
+import random
+import struct
+import sys
+import tempfile
+from array import array
+
+from snake_ai import open_neighbours
+from snake_fields import free_runs
+
+# Obstacle designs, as [x, y] offsets from the cell they are placed at
+possible_obstacles = [
+    [[-1, 0], [0, 0], [1, 0], [1, 1], [2, 1], [3, 1], [3, 2], [3, 3]],
+    [[0, 0], [0, 1], [0, 2], [0, 3], [1, 3], [2, 3], [3, 3], [4, 3], [4, 2], [4, 1], [4, 0]],
+    [[0, 0], [0, 1], [0, 2], [0, 3], [1, 1], [1, 2], [1, 3], [2, 2], [2, 3], [3, 3]],
+    [[0, 0], [1, 1], [2, 2], [3, 3]],
+    [[3, 0], [2, 1], [1, 2], [0, 3]]
+]
+
+# Straight walls of a few lengths, across and down
+wall_shapes = ([[[x, 0] for x in range(length)] for length in (6, 9, 12)]
+               + [[[0, y] for y in range(length)] for length in (6, 9, 12)])
+
+# Level templates: the shapes placed, and the range of how many are placed
+# on a default-sized board (bigger boards get as many more as they fit)
+level_templates = {
+    "classic": {"shapes": possible_obstacles, "count": (5, 10)},
+    "walls": {"shapes": wall_shapes, "count": (6, 10)},
+    "crowded": {"shapes": possible_obstacles, "count": (25, 35)},
+}
+default_level = "classic"
+
+# How many placements are tried for each obstacle wanted, and how many
+# layouts from one seed, before giving up
+placement_attempts = 20
+layout_attempts = 10
+
+# Layouts for boards with at least this many cells are saved in
+# level_cache_dir, next to this file; None turns the cache off
+level_cache_min_cells = 40000
+level_cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "level_cache")
+
+# Cache file header: magic, format version, board width and height and the
+# obstacle count, followed by each obstacle's cell index
+cache_header = struct.Struct("<4sBHHI")
+cache_magic = b"SNKL"
+cache_version = 1
+
+
+# Static functions here
+def generate_obstacles(width, height, seed, level=default_level, reserved=(), scale=1):
+    # Returns the sorted cell indexes (y * width + x) of a checked obstacle
+    # layout, keeping off the reserved indexes, with the count scaled by scale
+    path = None
+    if level_cache_dir is not None and width * height >= level_cache_min_cells:
+        key = repr((cache_version, width, height, seed, level, level_templates[level],
+                    sorted(reserved), scale, placement_attempts, layout_attempts))
+        path = os.path.join(level_cache_dir, hashlib.sha256(key.encode()).hexdigest() + ".level")
+        obstacles = read_cached_layout(path, width, height)
+        if obstacles is not None:
+            return obstacles
+    obstacles = make_layout(width, height, seed, level, set(reserved), scale)
+    if path is not None:
+        write_cached_layout(path, width, height, obstacles)
+    return obstacles
+
+
+def make_layout(width, height, seed, level, reserved, scale):
+    # Places shapes until the template's count is reached or the attempts run
+    # out, retrying with the next layout from the seed if the flood fill fails
+    template = level_templates[level]
+    for attempt in range(layout_attempts):
+        rng = random.Random(str(seed) + "/" + level + "/" + str(attempt))
+        blocked = bytearray(width * height)
+        obstacles = []
+        count = rng.randint(*template["count"]) * scale
+        placed = 0
+        for tries in range(count * placement_attempts):
+            if placed == count:
+                break
+            shape = template["shapes"][rng.randint(0, len(template["shapes"]) - 1)]
+            origin_x = rng.randint(2, width - 4)
+            origin_y = rng.randint(3, height - 4)
+            cells = [(origin_y + y) * width + origin_x + x for x, y in shape
+                     if 0 <= origin_x + x < width and 0 <= origin_y + y < height]
+            if cells and shape_fits(blocked, width, height, cells, reserved):
+                for i in cells:
+                    blocked[i] = 1
+                obstacles.extend(cells)
+                placed += 1
+        if is_connected(blocked, width, height):
+            return sorted(obstacles)
+    raise ValueError("Could not make a " + level + " layout for seed " + str(seed))
+
+
+def shape_fits(blocked, width, height, cells, reserved):
+    # Checks a shape's cells are free and unreserved, and that the free cells
+    # next to the shape can still all reach each other inside the box one cell around it
+    if any(blocked[i] or i in reserved for i in cells):
+        return False
+    size = width * height
+    shape = set(cells)
+    edge = {j for i in cells for j in open_neighbours(i, width, size, blocked) if j is not None and j not in shape}
+    if not edge:
+        return True
+    left = max(0, min(i % width for i in cells) - 1)
+    right = min(width - 1, max(i % width for i in cells) + 1)
+    top = max(0, min(i // width for i in cells) - 1)
+    bottom = min(height - 1, max(i // width for i in cells) + 1)
+    start = next(iter(edge))
+    seen = {start}
+    queue = [start]
+    for i in queue:
+        for j in open_neighbours(i, width, size, blocked):
+            if (j is not None and j not in seen and j not in shape
+                    and left <= j % width <= right and top <= j // width <= bottom):
+                seen.add(j)
+                queue.append(j)
+    return edge <= seen
+
+
+def is_connected(blocked, width, height):
+    # Checks that every free cell can reach every other one, by joining each
+    # run of free cells along a row to the runs it touches in the row above
+    # and seeing if they all end up in one group
+    groups = []
+    above = []
+    for y in range(height):
+        runs = []
+        position = 0
+        for start, end in free_runs(blocked[y * width:(y + 1) * width]):
+            run = len(groups)
+            groups.append(run)
+            runs.append((start, end, run))
+            while position < len(above) and above[position][1] <= start:
+                position += 1
+            touching = position
+            while touching < len(above) and above[touching][0] < end:
+                groups[group_of(groups, above[touching][2])] = group_of(groups, run)
+                touching += 1
+        above = runs
+    return len({group_of(groups, run) for run in range(len(groups))}) <= 1
+
+
+def group_of(groups, run):
+    # Follows a run's links to the run standing for its whole group
+    while groups[run] != run:
+        groups[run] = groups[groups[run]]
+        run = groups[run]
+    return run
+
+
+def read_cached_layout(path, width, height):
+    # Returns the layout saved at path, or None if there isn't a usable one
+    try:
+        with open(path, "rb") as layout_file:
+            data = layout_file.read()
+        magic, version, saved_width, saved_height, count = cache_header.unpack_from(data)
+    except (OSError, struct.error):
+        return None
+    obstacles = array("I")
+    try:
+        obstacles.frombytes(data[cache_header.size:])
+    except ValueError:
+        return None
+    if (magic != cache_magic or version != cache_version or (saved_width, saved_height) != (width, height)
+            or len(obstacles) != count):
+        return None
+    if sys.byteorder != "little":
+        obstacles.byteswap()
+    return obstacles.tolist()
+
+
+def write_cached_layout(path, width, height, obstacles):
+    # Saves a layout through a temporary file renamed into place, so games
+    # starting at the same time never read half of one. The cache only
+    # saves time, so a layout that can't be written is left unsaved
+    cells = array("I", obstacles)
+    if sys.byteorder != "little":
+        cells.byteswap()
+    try:
+        os.makedirs(level_cache_dir, exist_ok=True)
+        handle, temporary_path = tempfile.mkstemp(prefix=".level", dir=level_cache_dir)
+    except OSError:
+        return
+    try:
+        with os.fdopen(handle, "wb") as layout_file:
+            layout_file.write(cache_header.pack(cache_magic, cache_version, width, height, len(cells)))
+            layout_file.write(cells.tobytes())
+        os.replace(temporary_path, path)
+    except OSError:
+        os.remove(temporary_path)
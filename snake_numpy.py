@@ -0,0 +1,69 @@
+"""
+Optional NumPy layer for large boards.
+
+The board's tiles and snake counts stay in their bytearray and array form;
+BoardArrays only wraps them in NumPy views that share the same memory, so
+the two never need syncing. Bulk queries that would be Python loops over
+every cell become single array operations here. Without NumPy installed,
+or on boards smaller than numpy_min_cells, the engine and AI keep to their
+plain Python paths.
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Boards with fewer cells than this are quicker with plain Python
+numpy_min_cells = 10000
+
+
+def use_numpy(width, height):
+    return numpy is not None and width * height >= numpy_min_cells
+
+
+class BoardArrays:
+    """ NumPy views of a Board's tiles and per-cell snake counts. """
+
+    def __init__(self, board):
+        self.tiles = numpy.frombuffer(board.tiles, dtype=numpy.uint8)
+        self.snake_count = numpy.frombuffer(board.snake_count, dtype=numpy.uint16)
+
+
+def food_distances(snapshot, heads, budget, no_path):
+    # The same search as snake_ai.food_search(), growing each layer of cells
+    # with shifted boolean grids instead of a list of indexes. It stops
+    # once a neighbour of every head is reached or about budget cells are
+    width, height, blocked, food = snapshot
+    open_cells = numpy.frombuffer(blocked, dtype=numpy.uint8).reshape(height, width) == 0
+    distances = numpy.full((height, width), no_path, dtype=numpy.uint16)
+    frontier = numpy.zeros((height, width), dtype=bool)
+    frontier.flat[food] = True
+    frontier &= open_cells
+    reached = frontier.copy()
+
+    # The open cells next to each head, which that head is waiting to hear about
+    waiting = []
+    for head in heads:
+        x, y = head % width, head // width
+        near = [(x, y - 1), (x, y + 1), (x - 1, y), (x + 1, y)]
+        near = [nx + ny * width for nx, ny in near if 0 <= nx < width and 0 <= ny < height]
+        near = [i for i in near if open_cells.flat[i]]
+        if near:
+            waiting.append(near)
+
+    step = 0
+    while frontier.any():
+        distances[frontier] = step
+        waiting = [near for near in waiting if not reached.flat[near].any()]
+        if not waiting or reached.sum() >= budget:
+            break
+        grown = numpy.zeros_like(frontier)
+        grown[1:] |= frontier[:-1]
+        grown[:-1] |= frontier[1:]
+        grown[:, 1:] |= frontier[:, :-1]
+        grown[:, :-1] |= frontier[:, 1:]
+        frontier = grown & open_cells & ~reached
+        reached |= frontier
+        step += 1
+    return distances.ravel()
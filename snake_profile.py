@@ -0,0 +1,110 @@
+"""
+Per-frame profiling for the game loop.
+
+A Profiler times named phases by wrapping the functions or methods that run
+them, so nothing is added to the game loop until profiling is switched on:
+with it off, the methods are the plain ones and the loop only checks whether
+a profiler exists. Each phase's total time in a frame goes into a rolling
+history, which gives the averages, percentiles and histograms shown on the
+debug overlay. With tracing on, every timed call is also kept as a Chrome
+trace event, which write_trace() saves as JSON for chrome://tracing or
+https://ui.perfetto.dev.
+
+The pygame front ends switch this on when started with SNAKE_PROFILE=1 set
+in the environment, and also write a trace on exit to the file named by SNAKE_TRACE.
+"""
+
+import json
+import time
+from collections import deque
+
+# How many frames each phase's rolling history covers
+profile_history = 240
+
+# Upper bounds, in milliseconds, of the buckets in a phase's histogram; the
+# last bucket holds everything slower
+histogram_bounds = (0.25, 0.5, 1, 2, 4, 8, 16, 33)
+
+# The most timed calls a trace keeps; older ones are dropped first
+trace_limit = 200000
+
+
+class Profiler:
+    """ Times phases of each frame and keeps rolling histories of them. """
+
+    def __init__(self, history=profile_history, trace=False):
+        self.clock = time.perf_counter_ns
+        self.history = history
+        # Rolling per-frame totals in milliseconds for every phase seen so far
+        self.timings = {}
+        # Time spent in each phase so far this frame, in nanoseconds
+        self.frame_times = {}
+        # (phase, start, end) of every timed call, when tracing
+        self.trace_events = deque(maxlen=trace_limit) if trace else None
+        self.start_time = self.clock()
+        self.frame_start = self.start_time
+
+    def timed(self, name, function):
+        # Returns function wrapped so every call is timed as the phase name
+        clock = self.clock
+        record = self.record
+
+        def timed_function(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, start, clock())
+        return timed_function
+
+    def instrument(self, target, names):
+        # Replaces each named method on target with a timed one, using the method name as the phase
+        for name in names:
+            setattr(target, name, self.timed(name, getattr(target, name)))
+
+    def record(self, name, start, end):
+        self.frame_times[name] = self.frame_times.get(name, 0) + end - start
+        if self.trace_events is not None:
+            self.trace_events.append((name, start, end))
+
+    def end_frame(self):
+        # Adds this frame's phase totals, and the whole frame's time, to the histories
+        now = self.clock()
+        self.frame_times["frame"] = now - self.frame_start
+        self.frame_start = now
+        for name in self.frame_times.keys() | self.timings.keys():
+            if name not in self.timings:
+                self.timings[name] = deque(maxlen=self.history)
+            self.timings[name].append(self.frame_times.get(name, 0) / 1e6)
+        self.frame_times = {}
+
+    def skip_frame(self):
+        # Starts the next frame from now, dropping anything timed since the
+        # last end_frame(), for time spent away from the game loop
+        self.frame_start = self.clock()
+        self.frame_times = {}
+
+    def summary(self, name):
+        # Returns (mean, 99th percentile, max) of a phase over the history, in milliseconds
+        times = sorted(self.timings.get(name, ()))
+        if not times:
+            return 0.0, 0.0, 0.0
+        return sum(times) / len(times), times[len(times) * 99 // 100], times[-1]
+
+    def histogram(self, name):
+        # Returns how many frames in the history fell in each histogram_bounds bucket
+        counts = [0] * (len(histogram_bounds) + 1)
+        for milliseconds in self.timings.get(name, ()):
+            bucket = 0
+            while bucket < len(histogram_bounds) and milliseconds > histogram_bounds[bucket]:
+                bucket += 1
+            counts[bucket] += 1
+        return counts
+
+    def write_trace(self, path):
+        # Saves the traced calls in the Chrome trace event format, times in microseconds
+        events = [{"name": name, "ph": "X", "pid": 1, "tid": 1,
+                   "ts": (start - self.start_time) / 1000, "dur": (end - start) / 1000}
+                  for name, start, end in self.trace_events or ()]
+        with open(path, "w") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
@@ -0,0 +1,248 @@
+"""
+Drawing helpers shared by the pygame front ends in snake.py and
+snake_extended/snake_extended.py.
+
+BoardView is the part of each front end's Game that follows the player with
+a camera and redraws only the board cells that changed, sliding the snakes
+across between ticks. Nothing here opens a window by itself; call these
+after pygame.init() and pygame.display.set_mode().
+"""
+
+import os
+from collections import OrderedDict
+
+import pygame
+
+from snake_engine import EMPTY, FOOD, OBSTACLE
+
+# Size of one board cell in pixels and the margin left between segments
+cell_size = 15
+segment_margin = 3
+segment_size = cell_size - segment_margin
+
+# The window shows at most view_columns by view_rows cells, and boards bigger
+# than that scroll to keep the player's head at least camera_margin cells
+# from the edge of the view. SNAKE_BOARD may not make a board smaller than
+# min_board_size cells either way
+view_columns = 40
+view_rows = 40
+camera_margin = 10
+min_board_size = 20
+
+# Colours of the board's background, obstacles, enemies and player
+background_colour = (0, 0, 0)
+obstacle_colour = (0, 255, 0)
+enemy_colour = (0, 0, 255)
+player_colour = (255, 255, 255)
+
+# Filled tile surfaces shared by every sprite, keyed by (colour, size)
+tile_surfaces = {}
+
+# Rendered text surfaces keyed by (font, text, colour, background), least
+# recently used first, and how many are kept before the oldest is dropped
+text_surfaces = OrderedDict()
+text_cache_size = 64
+
+# Phases shown on the profiling overlay, with the label each is shown under
+overlay_phases = (("frame", "frame"), ("input", "input"), ("update", "ticks"), ("ai_movement", "ai"),
+                  ("check_player_collisions", "collide"), ("game_play_drawing", "draw"))
+overlay_colour = (255, 255, 0)
+overlay_background = (0, 0, 0)
+# Characters the overlay is sized for, so that it covers the same area each
+# frame and leaves nothing behind
+overlay_line_length = 44
+
+
+class BoardView:
+    """ Draws the part of a GameState's board in view, redrawing only the cells that changed. """
+
+    def __init__(self, state, screen, fruit_sprites, view_size):
+        # view_size is the (width, height) in cells the window has room for
+        self.state = state
+        self.screen = screen
+        self.fruit_sprites = fruit_sprites
+        # The cells the window shows across and down, and the top-left cell in view
+        board = state.board
+        self.view_size = (min(board.width, view_size[0]), min(board.height, view_size[1]))
+        self.camera = (0, 0)
+        self.follow_player()
+        # Board cells changed since the last frame
+        self.dirty_cells = set()
+        # Each (snake_id, head, tail) moved on the last tick, slid across the cells between ticks
+        self.moves = []
+
+    def follow_player(self):
+        # Scrolls the view just enough to keep the player's head camera_margin
+        # cells from its edges, without showing past the board. Returns whether it moved
+        head = self.state.my_snake.segments[0]
+        board = self.state.board
+        camera = (follow_axis(self.camera[0], head[0], self.view_size[0], board.width),
+                  follow_axis(self.camera[1], head[1], self.view_size[1], board.height))
+        moved = camera != self.camera
+        self.camera = camera
+        return moved
+
+    def in_view(self, cell):
+        # Checks whether a board cell is inside the part of the board the window shows
+        return (0 <= cell[0] - self.camera[0] < self.view_size[0]
+                and 0 <= cell[1] - self.camera[1] < self.view_size[1])
+
+    def draw_view(self):
+        # Draws every filled cell in view, leaving the rest of the board alone
+        for cell in self.state.board.filled_cells(*self.camera, *self.view_size):
+            self.draw_cell(cell)
+
+    def draw_cell(self, cell):
+        # Redraws whatever is on top at one board cell and returns its area
+        x, y = cell_to_pixel(cell, self.camera)
+        cell_rect = pygame.Rect(x, y, cell_size, cell_size)
+        self.screen.fill(background_colour, cell_rect)
+        board = self.state.board
+        i = board.index(cell)
+        if board.tiles[i] == OBSTACLE:
+            self.screen.blit(tile_surface(obstacle_colour, (segment_size, segment_size)), (x, y))
+        elif board.tiles[i] == FOOD:
+            self.screen.blit(self.fruit_sprites[self.state.food[cell][0]], (x, y))
+        elif board.snake_count[i] > self.state.my_snake.occupancy[i]:
+            self.screen.blit(tile_surface(enemy_colour, (segment_size, segment_size)), (x, y))
+        elif board.snake_count[i]:
+            self.screen.blit(tile_surface(player_colour, (segment_size, segment_size)), (x, y))
+        return cell_rect
+
+    def draw_moving_cells(self, alpha):
+        # Slides each snake's new head in and its old tail out by alpha of a cell,
+        # so movement looks smooth at the render rate. Returns the areas drawn
+        board = self.state.board
+        rects = []
+        for snake_id, head, tail in self.moves:
+            snake = self.state.snakes[snake_id]
+            colour = player_colour if snake.player else enemy_colour
+            if self.in_view(head):
+                rects.append(self.draw_cell(head))
+                if board.tiles[board.index(head)] == EMPTY:
+                    self.screen.fill(background_colour, rects[-1])
+                    self.screen.fill(colour, sliding_rect(head, snake.segments[1], alpha, self.camera))
+            if self.in_view(tail) and board.is_free(tail):
+                rects.append(self.draw_cell(tail))
+                self.screen.fill(colour, sliding_rect(tail, snake.segments[-1], 1 - alpha, self.camera))
+        return rects
+
+    def draw_profile(self, profiler, font):
+        # Draws the profiling overlay over the top-left of the board and returns its area
+        state = self.state
+        counts = (("snakes", len(state.snakes)), ("cells", sum(len(snake.segments) for snake in state.snakes)),
+                  ("food", len(state.food)), ("obstacles", len(state.obstacles)))
+        return draw_profile_overlay(self.screen, font, profiler, counts)
+
+
+# Static functions here
+def cell_to_pixel(cell, camera):
+    # Returns the top-left pixel of a board cell on the screen, with camera the top-left cell in view
+    return (cell[0] - camera[0]) * cell_size, (cell[1] - camera[1]) * cell_size
+
+
+def follow_axis(start, position, view, board):
+    # Returns the first cell in view along one axis once scrolled to keep
+    # position camera_margin cells inside a view cells long, on a board cells long
+    margin = min(camera_margin, (view - 1) // 2)
+    start = min(start, position - margin)
+    start = max(start, position + margin + 1 - view)
+    return max(0, min(start, board - view))
+
+
+def sliding_rect(cell, neighbour, fraction, camera):
+    # Returns the part of a cell's segment square that is fraction of the way
+    # across it, measured from the side that faces the neighbouring cell
+    x, y = cell_to_pixel(cell, camera)
+    length = round(segment_size * fraction)
+    if neighbour[0] < cell[0]:
+        return pygame.Rect(x, y, length, segment_size)
+    if neighbour[0] > cell[0]:
+        return pygame.Rect(x + segment_size - length, y, length, segment_size)
+    if neighbour[1] < cell[1]:
+        return pygame.Rect(x, y, segment_size, length)
+    return pygame.Rect(x, y + segment_size - length, segment_size, length)
+
+
+def board_size_setting(columns, rows):
+    # Returns the (columns, rows) board size SNAKE_BOARD asks for as
+    # WIDTHxHEIGHT, or the ones given if it isn't set
+    setting = os.environ.get("SNAKE_BOARD")
+    if not setting:
+        return columns, rows
+    try:
+        columns, rows = (int(size) for size in setting.lower().split("x"))
+    except ValueError:
+        raise SystemExit("SNAKE_BOARD should be WIDTHxHEIGHT, e.g. 1000x1000, not " + setting)
+    if min(columns, rows) < min_board_size:
+        raise SystemExit("SNAKE_BOARD must be at least " + str(min_board_size) + " cells each way")
+    return columns, rows
+
+
+def tile_surface(colour, size):
+    # Returns the shared Surface for a tile colour and (width, height),
+    # creating and filling it the first time it is asked for
+    key = (colour, size)
+    surface = tile_surfaces.get(key)
+    if surface is None:
+        surface = pygame.Surface(size).convert()
+        surface.fill(colour)
+        tile_surfaces[key] = surface
+    return surface
+
+
+def render_text(font, text, colour, background=None):
+    # Returns font.render(text, True, colour, background), only rasterising
+    # the text the first time that font, text and colours are asked for
+    key = (font, text, colour, background)
+    surface = text_surfaces.get(key)
+    if surface is None:
+        surface = font.render(text, True, colour, background)
+        text_surfaces[key] = surface
+        if len(text_surfaces) > text_cache_size:
+            text_surfaces.popitem(last=False)
+    else:
+        text_surfaces.move_to_end(key)
+    return surface
+
+
+def event_cells(event):
+    # Returns the board cells an engine event changed, so that only those need redrawing
+    if event[0] == "move":
+        return event[2], event[3]
+    if event[0] in ("grow", "eat"):
+        return event[2],
+    if event[0] == "food":
+        return event[1],
+    return ()
+
+
+def draw_profile_overlay(surface, font, profiler, counts, position=(4, 4)):
+    # Draws a profiler's phase timings, a histogram of frame times and the
+    # (label, number) pairs in counts at position, and returns the area drawn.
+    # The text changes every frame, so it is rendered directly rather than cached
+    lines = []
+    for name, label in overlay_phases:
+        mean, slow, worst = profiler.summary(name)
+        lines.append(label.ljust(8) + format(mean, "6.2f") + format(slow, "7.2f") + format(worst, "7.2f") + " ms")
+    lines.append("  ".join(label + " " + str(number) for label, number in counts))
+    images = [font.render(line, False, overlay_colour) for line in lines]
+    line_height = font.get_linesize()
+    histogram = profiler.histogram("frame")
+    bar_width = 6
+    bar_height = line_height * 2
+    width = max(font.size("0" * overlay_line_length)[0], max(image.get_width() for image in images),
+                len(histogram) * bar_width) + 8
+    height = line_height * len(images) + bar_height + 8
+    area = pygame.Rect(position[0], position[1], width, height)
+    surface.fill(overlay_background, area)
+    y = position[1] + 4
+    for image in images:
+        surface.blit(image, (position[0] + 4, y))
+        y += line_height
+    # One bar per histogram bucket, fastest on the left, scaled to the fullest bucket
+    tallest = max(histogram) or 1
+    for bucket, count in enumerate(histogram):
+        bar = round(bar_height * count / tallest)
+        surface.fill(overlay_colour, (position[0] + 4 + bucket * bar_width, y + bar_height - bar, bar_width - 1, bar))
+    return area
@@ -0,0 +1,136 @@
+"""
+Recording and replaying games.
+
+A GameState makes every random choice from its own generator, so a whole
+game is fixed by its seed, its settings and the player's input on each tick.
+A Replay stores just those: a small header followed by one byte of input per
+tick, compressed with zlib since most ticks have no key pressed. Playing a
+replay back steps the headless engine with nothing drawn, so a long game
+re-runs as fast as the CPU allows.
+
+Run "python snake_replay.py game.replay" to play one back and print how it ended.
+"""
+
+import argparse
+import struct
+import sys
+import time
+import zlib
+
+from snake_engine import GameState, board_height, board_width, number_of_enemies
+from snake_levels import default_level, level_templates
+
+# File header: magic, format version, seed, enemies, board width and height,
+# level, ticks. Version 1 replays came before obstacle layouts were made by
+# snake_levels, so their games can't be rebuilt any more
+replay_header = struct.Struct("<4sBQHHHBI")
+replay_magic = b"SNKR"
+replay_version = 2
+level_names = list(level_templates)
+
+# One byte per tick for the player's input, where 0 is no key pressed
+action_codes = {None: 0, "up": 1, "down": 2, "left": 3, "right": 4}
+code_actions = {code: action for action, code in action_codes.items()}
+
+
+class Replay:
+    """ The settings and seed a game started from and the player's input on every tick. """
+
+    def __init__(self, seed, enemies=number_of_enemies, width=board_width, height=board_height, inputs=b"",
+                 level=default_level):
+        self.seed = seed
+        self.enemies = enemies
+        self.width = width
+        self.height = height
+        self.level = level
+        self.inputs = bytearray(inputs)
+
+    def new_game(self):
+        # Returns a fresh GameState in the same starting position as the recorded one
+        return GameState(self.enemies, self.width, self.height, self.seed, self.level)
+
+    def record(self, player_action):
+        # Call with the same action given to GameState.step(), once per tick
+        self.inputs.append(action_codes.get(player_action, 0))
+
+    def actions(self):
+        # Yields the player's action for each recorded tick in order
+        for code in self.inputs:
+            yield code_actions[code]
+
+    def to_bytes(self):
+        header = replay_header.pack(replay_magic, replay_version, self.seed, self.enemies,
+                                    self.width, self.height, level_names.index(self.level), len(self.inputs))
+        return header + zlib.compress(bytes(self.inputs))
+
+    def save(self, path):
+        with open(path, "wb") as replay_file:
+            replay_file.write(self.to_bytes())
+
+
+# Static functions here
+def new_replay(state):
+    # Returns an empty Replay for a game that has not been stepped yet
+    return Replay(state.seed, len(state.enemy_snakes), state.board.width, state.board.height, level=state.level)
+
+
+def replay_from_bytes(data):
+    # Rebuilds a Replay from Replay.to_bytes(), raising ValueError if it isn't one
+    if len(data) < replay_header.size:
+        raise ValueError("Not a snake replay: too short")
+    magic, version, seed, enemies, width, height, level, ticks = replay_header.unpack_from(data)
+    if magic != replay_magic:
+        raise ValueError("Not a snake replay")
+    if version != replay_version:
+        raise ValueError("Unsupported replay version " + str(version))
+    if level >= len(level_names):
+        raise ValueError("Replay is of an unknown level")
+    inputs = zlib.decompress(data[replay_header.size:])
+    if len(inputs) != ticks:
+        raise ValueError("Replay input log is " + str(len(inputs)) + " ticks long, expected " + str(ticks))
+    return Replay(seed, enemies, width, height, inputs, level_names[level])
+
+
+def load_replay(path):
+    with open(path, "rb") as replay_file:
+        return replay_from_bytes(replay_file.read())
+
+
+def play_replay(replay, ticks=None):
+    # Steps a new game through the recorded inputs with nothing drawn and
+    # returns it, stopping early after ticks steps or once the game is lost
+    state = replay.new_game()
+    step = state.step
+    for action in replay.actions():
+        if state.game_lost or state.tick == ticks:
+            break
+        step(action)
+    return state
+
+
+def main(argv):
+    # Plays back each replay given and prints how it ended. Returns 1 if any
+    # couldn't be read, after going on with the rest
+    parser = argparse.ArgumentParser(description="Play back recorded snake games headlessly.")
+    parser.add_argument("paths", nargs="+", metavar="REPLAY_FILE")
+    args = parser.parse_args(argv)
+
+    status = 0
+    for path in args.paths:
+        try:
+            replay = load_replay(path)
+        except (OSError, ValueError, zlib.error) as error:
+            print(path + ": " + str(error), file=sys.stderr)
+            status = 1
+            continue
+        start = time.perf_counter()
+        state = play_replay(replay)
+        elapsed = time.perf_counter() - start
+        outcome = "game over" if state.game_lost else "still playing"
+        print(path + ": " + str(state.tick) + " ticks in " + format(elapsed, ".3f") + "s, score "
+              + str(state.current_score) + ", " + outcome)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,145 @@
+"""
+High-score storage for snake_extended.
+
+Scores are kept in a JSON file holding every saved (name, score) in the
+order they were set. Each new score rewrites the file through a temporary
+file that is then renamed over the old one, so a crash part way through a
+save leaves the previous table intact rather than a half-written one.
+
+A scores file that can't be read, isn't valid JSON in this layout or has a
+version this code doesn't know is renamed with corrupt_suffix and set aside
+rather than stopping the game, and the table starts again from the old
+text file if there is one, or empty.
+
+In memory the scores are held sorted best first, by score and then by the
+order they were set in, so a score equal to an existing one ranks below it.
+New scores are placed with bisect, and each player's own scores are kept
+sorted the same way for per-player tables.
+"""
+
+import bisect
+import json
+import os
+import tempfile
+
+# How many scores are kept, all players together; the lowest are dropped beyond it
+stored_scores = 10000
+
+# Version written into the file, raised whenever its layout changes
+scores_format = 1
+
+# Added to the name of a scores file that couldn't be loaded when it is set aside
+corrupt_suffix = ".corrupt"
+
+
+class HighScores:
+    """ Every saved score, ranked best first, backed by a JSON file. """
+
+    def __init__(self, path, limit=stored_scores, legacy_path=None):
+        self.path = path
+        self.limit = limit
+        # (-score, order, name) for every score, which sorts best first
+        self.entries = []
+        # name -> that player's (-score, order) keys, also best first
+        self.players = {}
+        self.next_order = 0
+        if os.path.exists(path):
+            try:
+                self.load()
+                return
+            except (OSError, ValueError):
+                self.set_aside()
+        if legacy_path is not None and os.path.exists(legacy_path):
+            self.load_legacy(legacy_path)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def load(self):
+        # Reads the scores file, raising ValueError if it isn't one this
+        # version can read (and OSError if it can't be read at all)
+        with open(self.path, encoding="utf-8") as scores_file:
+            try:
+                data = json.load(scores_file)
+                version = data["version"]
+                scores = [(str(entry["name"]), int(entry["score"])) for entry in data["scores"]]
+            except (ValueError, KeyError, TypeError) as error:
+                raise ValueError("High-score file " + self.path + " is not valid: " + str(error))
+        if version != scores_format:
+            raise ValueError("High-score file " + self.path + " has unsupported version " + str(version))
+        for name, score in scores:
+            self.insert(name, score)
+
+    def set_aside(self):
+        # Moves a scores file that couldn't be loaded out of the way, keeping
+        # it for anyone wanting to rescue it, and empties the table. If it
+        # can't be moved the next save simply replaces it
+        self.entries = []
+        self.players = {}
+        self.next_order = 0
+        try:
+            os.replace(self.path, self.path + corrupt_suffix)
+        except OSError:
+            pass
+
+    def load_legacy(self, legacy_path):
+        # Imports the old "name score" per line text file, best first, and
+        # saves it in the new format. Lines that don't read as a score are skipped
+        with open(legacy_path, encoding="utf-8", errors="replace") as legacy_file:
+            for line in legacy_file:
+                name, space, score = line.strip().rpartition(" ")
+                if space and score.lstrip("-").isdigit():
+                    self.insert(name, int(score))
+        self.save()
+
+    def insert(self, name, score):
+        # Ranks a score without saving, returning its place in the all-time
+        # table from 0, or None if it is too low to be kept
+        entry = (-score, self.next_order, name)
+        self.next_order += 1
+        rank = bisect.bisect(self.entries, entry)
+        if rank >= self.limit:
+            return None
+        self.entries.insert(rank, entry)
+        bisect.insort(self.players.setdefault(name, []), entry[:2])
+        if len(self.entries) > self.limit:
+            dropped = self.entries.pop()
+            player_scores = self.players[dropped[2]]
+            del player_scores[bisect.bisect_left(player_scores, dropped[:2])]
+            if not player_scores:
+                del self.players[dropped[2]]
+        return rank
+
+    def add(self, name, score):
+        # Records a new score and saves the table straight away. Returns the
+        # score's place in the all-time table from 0, or None if it was too low to keep
+        rank = self.insert(name, score)
+        if rank is not None:
+            self.save()
+        return rank
+
+    def top(self, count):
+        # Returns the best count (name, score) pairs of all time
+        return [(name, -key) for key, order, name in self.entries[:count]]
+
+    def player_top(self, name, count):
+        # Returns a player's own best count scores
+        return [-key for key, order in self.players.get(name, ())[:count]]
+
+    def save(self):
+        # Writes every score, in the order they were set, to a temporary file
+        # and renames it over the scores file in one step
+        entries = sorted(self.entries, key=lambda entry: entry[1])
+        data = {"version": scores_format,
+                "scores": [{"name": name, "score": -key} for key, order, name in entries]}
+        directory = os.path.dirname(os.path.abspath(self.path))
+        handle, temporary_path = tempfile.mkstemp(prefix=".high_scores", dir=directory)
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8") as temporary_file:
+                json.dump(data, temporary_file, indent=1)
+                temporary_file.flush()
+                os.fsync(temporary_file.fileno())
+            os.replace(temporary_path, self.path)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
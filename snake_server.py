@@ -0,0 +1,321 @@
+"""
+Authoritative network game server.
+
+Runs headless games for any number of rooms in one asyncio process. Clients
+connect over TCP and only send their input; every game is stepped on the
+server, once per tick for all rooms together, and each room's clients are
+sent that tick's engine events (heads added, tails freed, food eaten and
+spawned) rather than the whole board. A client joining a room gets the full
+game once, and from then on the events are enough to keep its copy in step.
+
+The engine has a single player snake per game, so the first client in a
+room plays and anyone joining after watches, taking over if the player leaves.
+
+Messages are JSON objects, one per line. From the client:
+    {"join": "room name"}     join a room, creating it if needed
+    {"input": "up"}           the direction to turn on the next tick
+    {"restart": true}         start a new game once the room's game is over
+From the server:
+    {"joined": room, "role": "player" or "spectator", "game": {...}}
+                              the whole game, on joining and on each restart
+    {"role": "player"}        this client has taken over as the player
+    {"tick": n, "events": [...]}
+                              the events of tick n, as lists in the engine's event layout
+    {"error": "..."}
+
+Run "python snake_server.py" to serve, or "python snake_server.py --bots 200"
+to serve and load it with that many scripted clients, one room each.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import deque
+
+from snake_engine import GameState, directions
+
+# Address served on by default, and how many ticks each room plays per second
+server_host = "127.0.0.1"
+server_port = 8765
+server_tick_rate = 10
+
+# Clients that fall this many bytes behind on reading are dropped rather
+# than letting their unsent messages pile up on the server
+write_buffer_limit = 256 * 1024
+
+# How many ticks of server timings are kept for reporting
+timing_history = 600
+
+
+class Room:
+    """ One authoritative game and the clients playing or watching it. """
+
+    def __init__(self, name, seed=None):
+        self.name = name
+        self.clients = []
+        self.player = None
+        self.action = None
+        self.new_game(seed)
+
+    def new_game(self, seed=None):
+        self.state = GameState(seed=seed)
+        self.action = None
+
+    def tick(self):
+        # Steps the game and sends its events to everyone in the room
+        if self.state.game_lost:
+            return
+        events = self.state.step(self.action)
+        self.action = None
+        self.broadcast({"tick": self.state.tick, "events": events})
+
+    def broadcast(self, message):
+        # Encodes the message once and queues it for every client in the room
+        line = encode(message)
+        for client in list(self.clients):
+            client.send_line(line)
+
+    def welcome(self, client):
+        role = "player" if client is self.player else "spectator"
+        client.send({"joined": self.name, "role": role, "game": game_state(self.state)})
+
+
+class Client:
+    """ One connection, and the room it is in. """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.room = None
+        self.closed = False
+
+    def send(self, message):
+        self.send_line(encode(message))
+
+    def send_line(self, line):
+        # Writes without waiting, dropping the connection if the client has stopped reading
+        if self.closed:
+            return
+        if self.writer.transport.get_write_buffer_size() > write_buffer_limit:
+            self.close()
+            return
+        self.writer.write(line)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.writer.close()
+
+
+class Server:
+    """ Holds every room and steps them all once per tick. """
+
+    def __init__(self, tick_rate=server_tick_rate):
+        self.tick_rate = tick_rate
+        self.rooms = {}
+        # Seconds each recent tick took to step and broadcast every room
+        self.tick_times = deque(maxlen=timing_history)
+        self.ticks = 0
+
+    async def handle_client(self, reader, writer):
+        # Reads one client's messages until it disconnects
+        client = Client(writer)
+        try:
+            while not client.closed:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    if not isinstance(message, dict):
+                        raise ValueError("messages must be JSON objects")
+                except ValueError as error:
+                    client.send({"error": "Bad message: " + str(error)})
+                    continue
+                try:
+                    self.handle_message(client, message)
+                except (TypeError, ValueError) as error:
+                    # Whatever a client sends, it only ever gets an error back
+                    client.send({"error": "Bad message: " + str(error)})
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            self.leave(client)
+            client.close()
+
+    def handle_message(self, client, message):
+        if "join" in message:
+            self.join(client, str(message["join"]))
+        elif client.room is None:
+            client.send({"error": "Join a room first"})
+        elif "input" in message:
+            if client is not client.room.player:
+                client.send({"error": "Only the player can steer"})
+            elif not isinstance(message["input"], str) or message["input"] not in directions:
+                client.send({"error": "Unknown direction: " + str(message["input"])})
+            else:
+                client.room.action = message["input"]
+        elif "restart" in message:
+            room = client.room
+            if client is room.player and room.state.game_lost:
+                room.new_game()
+                for other in room.clients:
+                    room.welcome(other)
+        else:
+            client.send({"error": "Unknown message"})
+
+    def join(self, client, name):
+        self.leave(client)
+        room = self.rooms.get(name)
+        if room is None:
+            room = self.rooms[name] = Room(name)
+        room.clients.append(client)
+        if room.player is None:
+            room.player = client
+        client.room = room
+        room.welcome(client)
+
+    def leave(self, client):
+        # Takes a client out of its room, handing the snake on or closing the room
+        room = client.room
+        if room is None:
+            return
+        client.room = None
+        room.clients.remove(client)
+        if not room.clients:
+            del self.rooms[room.name]
+        elif room.player is client:
+            room.player = room.clients[0]
+            room.player.send({"role": "player"})
+
+    async def tick_loop(self):
+        # Steps every room at tick_rate, skipping ahead rather than bunching
+        # ticks together if a tick overruns
+        loop = asyncio.get_running_loop()
+        interval = 1 / self.tick_rate
+        next_tick = loop.time()
+        while True:
+            start = time.perf_counter()
+            for room in list(self.rooms.values()):
+                room.tick()
+            self.tick_times.append(time.perf_counter() - start)
+            self.ticks += 1
+            next_tick += interval
+            delay = next_tick - loop.time()
+            if delay < 0:
+                next_tick = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    async def serve(self, host=server_host, port=server_port):
+        # Starts listening and ticking; returns the asyncio server and the tick task
+        server = await asyncio.start_server(self.handle_client, host, port)
+        ticker = asyncio.ensure_future(self.tick_loop())
+        return server, ticker
+
+
+# Static functions here
+def encode(message):
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode()
+
+
+def game_state(state):
+    # The whole of a game as a JSON-ready dict, for clients joining part way through
+    return {
+        "seed": state.seed,
+        "level": state.level,
+        "width": state.board.width,
+        "height": state.board.height,
+        "tick": state.tick,
+        "score": state.current_score,
+        "lost": state.game_lost,
+        "obstacles": sorted(state.obstacles),
+        "food": [[cell, kind, value] for cell, (kind, value) in state.food.items()],
+        "snakes": [list(snake.segments) for snake in state.snakes],
+    }
+
+
+async def bot(host, port, room, duration, seed):
+    # A scripted client: joins room, turns at random now and then, restarts
+    # after losing, and checks every tick arrives in order. Returns the ticks it saw
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(encode({"join": room}))
+    joined = json.loads(await reader.readline())
+    last_tick = joined["game"]["tick"]
+    heading = "right"
+    seen = 0
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        try:
+            line = await asyncio.wait_for(reader.readline(), end - time.perf_counter())
+        except asyncio.TimeoutError:
+            break
+        message = json.loads(line)
+        if "joined" in message:
+            last_tick = message["game"]["tick"]
+            continue
+        if "tick" not in message:
+            continue
+        if message["tick"] != last_tick + 1:
+            raise AssertionError("Room " + room + " skipped from tick " + str(last_tick) + " to " + str(message["tick"]))
+        last_tick = message["tick"]
+        seen += 1
+        if any(event[0] == "game_over" for event in message["events"]):
+            writer.write(encode({"restart": True}))
+            heading = "right"
+        elif rng.randint(1, 5) == 1:
+            opposite = {"up": "down", "down": "up", "left": "right", "right": "left"}[heading]
+            heading = rng.choice([direction for direction in directions if direction != opposite])
+            writer.write(encode({"input": heading}))
+    writer.close()
+    return seen
+
+
+async def load_test(bots, duration, tick_rate):
+    # Serves on a spare local port, runs bots scripted clients against it and prints how it kept up
+    game_server = Server(tick_rate)
+    server, ticker = await game_server.serve(server_host, 0)
+    port = server.sockets[0].getsockname()[1]
+    seen = await asyncio.gather(*(bot(server_host, port, "room " + str(number), duration, number)
+                                  for number in range(bots)))
+    ticker.cancel()
+    server.close()
+    await server.wait_closed()
+    times = sorted(game_server.tick_times)
+    print(str(bots) + " rooms for " + str(duration) + "s at " + str(tick_rate) + " ticks/s: "
+          + format(sum(seen) / bots / duration, ".1f") + " ticks/s reached per room")
+    if times:
+        print("server tick for all rooms: median " + format(times[len(times) // 2] * 1000, ".2f")
+              + "ms, p99 " + format(times[len(times) * 99 // 100] * 1000, ".2f") + "ms")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Serve networked snake games.")
+    parser.add_argument("--host", default=server_host)
+    parser.add_argument("--port", type=int, default=server_port)
+    parser.add_argument("--tick-rate", type=int, default=server_tick_rate)
+    parser.add_argument("--bots", type=int, default=0,
+                        help="instead of serving, load test with this many scripted clients")
+    parser.add_argument("--seconds", type=float, default=10, help="how long a load test runs")
+    args = parser.parse_args(argv)
+
+    if args.bots:
+        asyncio.run(load_test(args.bots, args.seconds, args.tick_rate))
+        return
+
+    async def serve_forever():
+        server, ticker = await Server(args.tick_rate).serve(args.host, args.port)
+        print("Serving snake on " + args.host + ":" + str(args.port))
+        async with server:
+            await server.serve_forever()
+    try:
+        asyncio.run(serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])